@@ -1,318 +1,234 @@
+import argparse
+import functools
 import os
-import random
+import secrets
 import time
 import neat
+import numpy as np
 import pygame
 
-pygame.font.init() # creating the pygame font
-WIN_WIDTH = 500
-WIN_HEIGHT = 800
-
-BIRD_IMGS = [pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "bird1.png"))), pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "bird2.png"))), pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "bird3.png")))]
-PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "pipe.png")))
-BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "base.png")))
-BACKGROUND_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("../static", "imgs", "bg.png")))
-FONT = pygame.font.SysFont("comicsans", 100) # sets the style of the font in pygame
-
-class Bird():
-    '''Represents a Bird object'''
-    IMGS = BIRD_IMGS
-    MAX_ROTATION = 25 # how much the bird can rotate
-    ROT_VEL = 20 # how fast the bird rotates
-    ANIMATION_TIME = 5 # how fast the animation changes between the bird
-
-    def __init__(self, x, y):
-        self.x = x # bird's position in the x axis
-        self.y = y # bird's position in the y axis
-        self.tilt = 0 # the direction the bird is pointing in from -90 (completely down) to MAX_ROTATION (up)
-        self.tick_count = 0  # counting the ticks of the game loop, how many ticks went by since the last jump
-        self.vel = 0 # how fast the bird is travelling
-        self.height = self.y # keeps track of where the bird jumped from
-        self.img_count = 0
-        self.img = self.IMGS[0]
-
-    def jump(self):
-        '''Changes the bird to go in the upward direction'''
-        self.vel = -10.5 # change the velocity to point up (negative is up)
-        self.tick_count = 0 # reset tick count when jump
-        self.height = self.y # set the height of where we jumped from
-
-    def move(self):
-        '''Calculates how the bird is moving and whether to tilt the bird pointing up or down'''
-        self.tick_count += 1
-        displacement = self.vel*self.tick_count + 1.5*self.tick_count**2 # how many pixels we are moving the bird
-        # terminal velocity in the downward direction
-        if displacement > 16:
-            displacement = 16
-        # if moving upwards, move up a bit more
-        elif displacement < 0:
-            displacement -= 2
-        # change the position in the y axis by the calculated displacement
-        self.y += displacement
-
-        #### to calculate the tilt of the bird ###
-        # if we're moving upwards or have recently jumped, change the tilt of the bird to look up
-        if (displacement < 0) or (self.y < self.height + 50):
-            if self.tilt < self.MAX_ROTATION:
-                # set the tilt of the bird to look up
-                self.tilt = self.MAX_ROTATION
-        # else, then we're moving the downwards so tilt the bird down
-        else:
-            if self.tilt > -90:
-                # if the bird is not tilted completely downwards, keep turning the bird down by the rotational velocity
-                self.tilt -= self.ROT_VEL
-    
-    def draw(self, window):
-        '''Draws and animates the bird flapping'''
-        self.img_count += 1
-
-        # To animate the bird flapping, change images based on the animation time of the bird
-        # rotates between wings up, wings parallel, and wings down
-        if (self.img_count < self.ANIMATION_TIME) or (self.img_count == self.ANIMATION_TIME*4):
-            # wings up
-            self.img = self.IMGS[0]
-            if (self.img_count == self.ANIMATION_TIME*4):
-                # reset the animation back to 0
-                self.img_count = 0
-        elif (self.img_count < self.ANIMATION_TIME*2) or (self.img_count >= self.ANIMATION_TIME*3 and self.img_count < self.ANIMATION_TIME*4):
-            # wings parallel
-            self.img = self.IMGS[1]
-        elif (self.img_count >= self.ANIMATION_TIME*2) and (self.img_count < self.ANIMATION_TIME*3):
-            # wings down
-            self.img = self.IMGS[2]
-
-        if self.tilt <= -80:
-            # if the bird has been falling for awhile then don't flap
-            self.img = self.IMGS[1]
-            self.img_count = self.ANIMATION_TIME*2
-
-        rotated_img = pygame.transform.rotate(self.img, self.tilt)
-        rect = rotated_img.get_rect(center=self.img.get_rect(topleft=(self.x, self.y)).center)
-        window.blit(rotated_img, rect.topleft)
-
-    def get_mask(self):
-        '''Returns a Mask for the bird'''
-        return pygame.mask.from_surface(self.img)
-
-
-class Pipe():
-    '''Represents a pipe object'''
-    GAP = 190 # the space between the two pipes
-    VEL = 5 # the speed at which the background (pipes and base) moves in the x direction
-
-    def __init__(self, x):
-        self.x = x # position of the pipe in the x axis
-        self.height = 0 # the height of the pipe in the y axis
-        self.top = 0 # top of the pipe
-        self.bottom = 0 # bottom of the pipe
-        self.pipe_top = pygame.transform.flip(PIPE_IMG, False, True) # the flipped pipe on the top
-        self.pipe_bottom = PIPE_IMG # the pipe on the bottom
-
-        self.passed = False # if bird has passed the pipe
-        self.set_height()
-
-    def set_height(self):
-        '''Randomly generates the height of the pipe'''
-        self.height = random.randrange(80, 450)
-        bottom_pipe_height = WIN_HEIGHT-self.height-self.GAP
-        bottom_pipe_coords = WIN_HEIGHT-bottom_pipe_height
-        self.top = WIN_HEIGHT-self.GAP-bottom_pipe_height-self.pipe_top.get_size()[1]
-        self.bottom = WIN_HEIGHT-bottom_pipe_height
-
-    def draw(self, window):
-        '''Draws the pipe image onto the background window'''
-        pipe_height = self.pipe_top.get_size()[1]
-        bottom_pipe_height = WIN_HEIGHT-self.height-self.GAP
-        bottom_pipe_coords = WIN_HEIGHT-bottom_pipe_height
-        window.blit(self.pipe_top, (self.x, WIN_HEIGHT-self.GAP-bottom_pipe_height-pipe_height))
-        window.blit(self.pipe_bottom, (self.x, bottom_pipe_coords))
-
-    def move(self):
-        '''Moves the pipes a fixed distance based on VEL'''
-        self.x -= self.VEL
-
-    def collision(self, bird):
-        '''Determins if the pipe has collided with the bird'''
-        bird_mask = bird.get_mask()
-        top_mask = pygame.mask.from_surface(self.pipe_top)
-        bottom_mask = pygame.mask.from_surface(self.pipe_bottom)
-        top_mask_offset = (int(self.x - bird.x), self.top - round(bird.y)) 
-        bottom_mask_offset = (int(self.x - bird.x), self.bottom - round(bird.y)) 
-
-        top_overlap = bird_mask.overlap(top_mask, top_mask_offset)
-        bottom_overlap = bird_mask.overlap(bottom_mask, bottom_mask_offset)
-
-        if top_overlap or bottom_overlap:
-            return True
-        else:
-            return False
-
-class Base():
-    '''Represents the base (ground) of the game'''
-    VEL = 5 # the speed at which the background (pipes and base) moves in the x direction
-    BASE_WIDTH = BASE_IMG.get_width()
-
-    def __init__(self):
-        self.x = 0 # the position in the x direction where the base starts
-        self.x2 = self.BASE_WIDTH # position where the second base starts which makes it look like one continuous movement
-        self.y = WIN_HEIGHT-100 # the position in the y direction where the base will be
-        self.base = BASE_IMG # the image of the base
-
-    def draw(self, window):
-        '''Draws the base on the window in its x and y coordinates'''
-        window.blit(self.base, (self.x, self.y))
-        window.blit(self.base, (self.x2, self.y))
-
-    def move(self):
-        '''Moves the base left by VEL pixels'''
-        self.x -= self.VEL
-        self.x2 -= self.VEL
-        if (self.x + self.BASE_WIDTH < 0):
-            # if the first base has moved off the screen, redraw it at the end of the second base
-            self.x = self.x2 + self.BASE_WIDTH
-        if (self.x2 + self.BASE_WIDTH < 0):
-            # if the second base has moved off the screen
-            self.x2 = self.x + self.BASE_WIDTH
-
-    def collision(self, bird):
-        '''Determins if the base has collided with the bird'''
-        return bird.y >= self.y-40
-
-    def get_x(self):
-        '''Return the x coordinate of the base'''
-        return self.x
-
-
-
-def draw_window(window, base, birds, pipes, score):
-    '''Draws the assets onto the game window'''
-    window.blit(BACKGROUND_IMG, (0, 0))
-    for pipe in pipes:
-        pipe.draw(window)
-    text = FONT.render(str(score), 1, (255,255,255))
-    window.blit(text, (WIN_WIDTH-10-text.get_width(), 10))
-    base.draw(window)
-    for bird in birds:
-        bird.draw(window)
-    pygame.display.update()
-
-
-def main(genomes, config):
+from batch_network import BatchedNetworks
+from checkpoint import BackgroundCheckpointer, latest_run, restore_latest, run_directory
+from course import make_courses
+from distributed import DistributedEvaluator, parse_address
+from env import FlappyEnv
+import game
+from network_cache import NetworkCache
+from parallel_eval import PoolEvaluator
+import policy
+from replay import TraceRecorder
+from reporters import PhaseProfiler, StatsLog
+from speciation import CachedSpeciesSet
+from training import TrainingSettings
+from viewer import Viewer
+
+
+def main(genomes, config, headless=False, courses=None, profiler=None, viewer=None, recorder=None, cache=None, stats=None,
+         stop_at_threshold=True):
+    '''Plays one generation of the game, every genome on each of the courses,
+    and sets each genome's fitness. Returns the frames played and the pipes
+    passed on the first course.
+    '''
 
     # lists for the neural networks
-    birds = []
     networks = []
     ge = []
 
     for _, g in genomes:
         # create the lists
-        networks.append(neat.nn.FeedForwardNetwork.create(g, config))
-        birds.append(Bird(WIN_WIDTH/2-25, WIN_HEIGHT/2-100))
+        networks.append(cache.network(g, config) if cache is not None else neat.nn.FeedForwardNetwork.create(g, config))
         g.fitness = 0
         ge.append(g)
-
-    # set up game assets
-    pipe = Pipe(WIN_WIDTH)
-    pipes = [pipe] # create the first pipe and set its height randomly
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)) # create the game window
-    base = Base()
+    networks = BatchedNetworks(networks) # evaluate every network together each frame
+    training = getattr(config, 'training', None) or TrainingSettings()
+    if courses is None:
+        courses = make_courses(training.courses)
+
+    # set up the game, where the birds playing course w are w*len(ge) to (w+1)*len(ge)-1, in the same order as ge
+    env = FlappyEnv(len(ge)*len(courses), profiler)
+    observations = env.reset(courses=[course for course in courses for _ in ge])
+    fitness = np.zeros(env.num_worlds)
+    rows = np.arange(env.num_worlds) % max(len(ge), 1) # the network that controls each bird
+    shown_world = env.world(0)
+    if not headless:
+        win = pygame.display.set_mode((game.WIN_WIDTH, game.WIN_HEIGHT)) # create the game window
+        clock = pygame.time.Clock()
+        drawn = None # rects drawn in the last frame
     run = True
-    clock = pygame.time.Clock()
+    criterion = {'max': np.max, 'min': np.min, 'mean': np.mean}.get(config.fitness_criterion)
+    # eval_genomes turns this off, since stopping only makes sense for a game of the whole population
+    stop_at_threshold = stop_at_threshold and training.stop_at_threshold and criterion is not None and not config.no_fitness_termination
+    start_time = time.perf_counter()
+    frames = 0
+    if recorder is not None:
+        recorder.start()
 
-    score = 0
     while run:
-        clock.tick(30) # sets the tick rate so that only 30 frames pass per game tick
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-        base.move()
-        # figure out which pipe the neural network should look at when evaluating to jump
-        pipe_index = 0 if not pipes[0].passed else 1
-        for x, bird in enumerate(birds):
-            # determine the output using the following inputs
-            # the bird's y position, distance between the bird and the top pipe in the y axis, distance between the bird and the bottom pipe
-            # uses the tanh activation function to determine the output
-            output = networks[x].activate((bird.y, abs(bird.y-pipes[pipe_index].height), abs(bird.y-pipes[pipe_index].bottom)))
-            bird.move()
-            ge[x].fitness += 0.1
-            # determine if the bird should jump
-            if output[0] > 0.5:
-                bird.jump()
-        add_pipe = False
-        pipes_to_remove = []
-        for pipe in pipes:
-            for i, bird in enumerate(birds):
-                # for every bird, check if it has collided with a pipe
-                if pipe.collision(bird):
-                    # if the bird collides, then remove it and its associated
-                    # data from all the lists
-                    ge[i].fitness -= 1
-                    birds.pop(i)
-                    networks.pop(i)
-                    ge.pop(i)
-                if pipe.x + PIPE_IMG.get_width() < bird.x and not pipe.passed:
-                    if bird.y < 0:
-                        # case where the bird flies up off the game screen and passes a pipe,
-                        # it should collide
-                        bird.pop(i)
-                        ge.pop(i)
-                        networks.pop(i)
-                    else:
-                        # if pipe has passed the bird, need to draw another pipe
-                        # add one to the score
-                        pipe.passed = True
-                        add_pipe = True
-                        score += 1
-            if pipe.x + PIPE_IMG.get_width() <= 0:
-                # if the pipe has moved off the screen need to remove the pipe
-                pipes_to_remove.append(pipe)
-            pipe.move()
-        if add_pipe:
-            # create a new pipe if the birds have passed one
-            for g in ge:
-                # increase the fitness
-                g.fitness += 5
-            new_pipe = Pipe(WIN_WIDTH)
-            pipes.append(new_pipe)
-        for pipe in pipes_to_remove:
-            # remove pipes that have gone off the screen
-            pipes.remove(pipe)
-        for i, bird in enumerate(birds):
-            # check if each bird has hit the ground. Remove if they have
-            if base.collision(bird):
-                birds.pop(i)
-                ge.pop(i)
-                networks.pop(i)
-        draw_window(win, base, birds, pipes, score)
-        if len(birds) == 0:
+        if not headless:
+            clock.tick(30) # sets the tick rate so that only 30 frames pass per game tick
+        if profiler is not None:
+            profiler.start_frame()
+        if not headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    run = False
+                    pygame.quit()
+                    quit()
+        if profiler is not None:
+            profiler.lap("events")
+        # determine if the live birds should jump from the output of their networks, given
+        # the bird's y position, distance between the bird and the top pipe in the y axis, distance between the bird and the bottom pipe
+        alive = env.birds.living()
+        jumping = np.zeros(env.num_worlds, dtype=bool)
+        jumping[alive] = networks.decide(observations[alive], rows[alive])
+        if recorder is not None:
+            recorder.record(jumping)
+        if profiler is not None:
+            profiler.lap("networks")
+        observations, rewards, dones = env.step(jumping)
+        fitness += rewards
+        if not headless and frames % training.draw_every == 0:
+            shown = env.birds.living(shown_world.members)
+            if training.draw_top and len(shown) > training.draw_top:
+                # only draw the fittest birds
+                shown = shown[np.argsort(-fitness[shown], kind="stable")[:training.draw_top]]
+            drawn = env.draw(win, drawn, shown)
+        if viewer is not None:
+            viewer.publish(frames, shown_world.score, env.base, shown_world.pipes, env.birds, fitness, shown_world.members)
+        if profiler is not None:
+            profiler.lap("draw")
+            profiler.end_frame()
+        frames += 1
+        if dones.all():
             # if we have no more birds, then move onto the next generation
             run = False
+        elif training.out_of_budget(frames, max(world.score for world in env.worlds), time.perf_counter()-start_time):
+            # stop strong birds from keeping the generation going forever
+            run = False
+        elif stop_at_threshold and criterion(training.aggregate(fitness.reshape(len(courses), -1))) >= config.fitness_threshold:
+            # a genome is already good enough, so the run will stop after this generation
+            run = False
+
+    for g, f in zip(ge, training.aggregate(fitness.reshape(len(courses), -1))):
+        g.fitness = float(f)
+    if recorder is not None:
+        recorder.save(courses, ge, fitness, frames)
+    if stats is not None:
+        stats.add_game(frames, max(world.score for world in env.worlds))
+    return frames, shown_world.score
+
+
+worker_cache = NetworkCache() # networks compiled in this worker process, kept between chunks
+
 
+def eval_genomes(genomes, config, courses):
+    '''Simulates a chunk of genomes headless on the given courses and returns
+    their fitness. This runs in the PoolEvaluator worker processes'''
+    # the chunk is only part of the population, so stopping once it reaches the
+    # threshold would make a genome's fitness depend on which chunk it is in
+    main(genomes, config, headless=True, courses=courses, cache=worker_cache, stop_at_threshold=False)
+    return [g.fitness for _, g in genomes]
 
-def run(config_file):
+
+def run(config_file, headless=False, workers=0, chunk_size=None, seed=None, profile=False, profile_file=None, view=False, record=None,
+        checkpoint_dir=None, keep=3, resume=False, listen=None, authkey=None, worker_timeout=None, cache_size=1000,
+        policy_file="winner.npz", stats_file="stats.csv"):
     '''Sets up the population and the number of generations to run
-    the game for.
+    the game for, and saves the best genome to policy_file.
     '''
-    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, config_file)
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, CachedSpeciesSet, neat.DefaultStagnation, config_file)
+    config.training = TrainingSettings(config_file)
+
+    # every run gets its own checkpoint directory, unless it carries on the newest one
+    if checkpoint_dir is None:
+        checkpoint_dir = (latest_run() if resume else None) or run_directory()
+    # create population, or carry on from the last checkpoint
+    pop = restore_latest(checkpoint_dir, config) if resume else None
+    if pop is None:
+        pop = neat.population.Population(config)
 
-    # create population
-    pop = neat.population.Population(config)
-    
     # statistics report
     pop.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
+    # made first, since it refuses a directory holding another run's checkpoints before anything is written
+    checkpointer = BackgroundCheckpointer(5, checkpoint_dir, keep, resume=resume)
+    checkpointer.best_genome = pop.best_genome
+    pop.add_reporter(checkpointer)
+    stats = StatsLog(stats_file, resume_from=pop.generation if resume else None)
     pop.add_reporter(stats)
-    pop.add_reporter(neat.Checkpointer(5))
-
-    # run for 30 generations
-    winner = pop.run(main, 30)
-
+    evaluator = None
+    viewer = None
+    try:
+        local = not workers and not listen # whether the games are played in this process
+        profiler = None
+        if profile and local:
+            profiler = PhaseProfiler(profile_file)
+            pop.add_reporter(profiler)
+        viewer = Viewer() if view and local else None
+        recorder = None
+        if record and local:
+            recorder = TraceRecorder(record)
+            pop.add_reporter(recorder)
+
+        cache = NetworkCache(cache_size)
+        pop.add_reporter(cache)
+
+        courses = make_courses(config.training.courses, seed) if seed is not None else None
+        if listen:
+            if authkey is None:
+                # never fall back on a key anyone could guess, the workers unpickle what they are sent
+                authkey = secrets.token_hex(16)
+                print("Start the workers with --authkey {0}".format(authkey))
+            evaluator = DistributedEvaluator(parse_address(listen), authkey.encode(), chunk_size, courses, worker_timeout)
+            fitness_function = evaluator.evaluate
+        elif workers:
+            evaluator = PoolEvaluator(workers, eval_genomes, chunk_size, courses)
+            fitness_function = evaluator.evaluate
+        else:
+            fitness_function = functools.partial(main, headless=headless, courses=courses, profiler=profiler, viewer=viewer,
+                                                 recorder=recorder, cache=cache, stats=stats)
+        if courses is not None and config.training.repeatable(config):
+            fitness_function = cache.reuse_fitness(fitness_function, courses)
+
+        # run for 30 generations in total
+        winner = pop.run(fitness_function, 30 - pop.generation)
+    finally:
+        checkpointer.close()
+        stats.close()
+        if evaluator is not None:
+            evaluator.close()
+        if viewer is not None:
+            viewer.close()
+
+    if winner is not None and policy_file:
+        policy.export(winner, config, policy_file)
+        print("Saved the best genome (fitness {0:.1f}) to {1}".format(winner.fitness, policy_file))
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Flappy Bird AI with NEAT")
+    parser.add_argument("--headless", action="store_true", help="train without a window or frame rate cap")
+    parser.add_argument("--workers", type=int, default=0, help="simulate each generation headless across this many processes")
+    parser.add_argument("--chunk-size", type=int, default=None, help="genomes sent to a worker at a time (default: split evenly)")
+    parser.add_argument("--seed", type=int, default=None, help="play every generation on the courses with this seed")
+    parser.add_argument("--profile", action="store_true", help="report the time spent in each phase of the game loop every generation")
+    parser.add_argument("--profile-file", default=None, help="also append the phase breakdowns to this file as JSON lines")
+    parser.add_argument("--view", action="store_true", help="watch the fittest birds in a separate window while training headless")
+    parser.add_argument("--record", default=None, help="save a trace of every generation's jumps in this directory")
+    parser.add_argument("--checkpoint-dir", default=None, help="directory to save checkpoints in (default: a new checkpoints/run-<time>, or the newest one with --resume)")
+    parser.add_argument("--keep", type=int, default=3, help="number of the newest checkpoints to keep, 0 for all (default: 3)")
+    parser.add_argument("--resume", action="store_true", help="carry on from the newest checkpoint in the checkpoint directory (default: the newest run's)")
+    parser.add_argument("--listen", default=None, help="host:port to hand generations out to distributed.py workers on")
+    parser.add_argument("--authkey", default=None, help="shared secret the distributed.py workers must use (default: a random one, printed)")
+    parser.add_argument("--worker-timeout", type=float, default=None, help="seconds a distributed.py worker can take over a chunk before it is dropped")
+    parser.add_argument("--policy", default="winner.npz", help="file to save the best genome to as a policy (default: winner.npz)")
+    parser.add_argument("--stats", default="stats.csv", help="CSV file to write every generation's statistics to, carried on with --resume (default: stats.csv)")
+    parser.add_argument("--cache-size", type=int, default=1000, help="number of genomes to keep compiled networks (and fitness, with --seed) for, 0 for none")
+    args = parser.parse_args()
     path = os.path.realpath(__file__)
     dirname = os.path.dirname(path)
     config_file = os.path.join(dirname, 'config-neat.txt')
-    run(config_file)
+    run(config_file, headless=args.headless, workers=args.workers, chunk_size=args.chunk_size, seed=args.seed,
+        profile=args.profile or bool(args.profile_file), profile_file=args.profile_file, view=args.view,
+        record=args.record, checkpoint_dir=args.checkpoint_dir, keep=args.keep, resume=args.resume,
+        listen=args.listen, authkey=args.authkey, worker_timeout=args.worker_timeout, cache_size=args.cache_size,
+        policy_file=args.policy, stats_file=args.stats)
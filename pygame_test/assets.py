@@ -0,0 +1,119 @@
+import functools
+import os
+
+import numpy as np
+import pygame
+
+# images live next to this directory, wherever the game is run from
+IMGS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "static", "imgs")
+# the shapes of the images the game is simulated with, so a headless game never loads an image
+MASKS_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "static", "masks.npz")
+SIMULATED = ["bird1", "bird2", "bird3", "pipe", "base"]
+
+_images = {} # (name, flipped, converted, opaque) -> surface
+_rotated = {} # (name, angle, converted) -> rotated surface
+_masks = {} # (name, flipped) -> collision mask
+_fonts = {} # size -> font
+_bits = None # name -> which pixels of the image are solid, from MASKS_FILE
+
+
+def image(name, flipped=False, opaque=False):
+    '''Returns static/imgs/<name>.png scaled up 2x, flipped upside down if
+    flipped. Images are loaded the first time they are asked for, and once a
+    window is open they are also converted to the display's pixel format,
+    which makes blitting them much faster. opaque images (the background)
+    drop their alpha channel when converted'''
+    converted = pygame.display.get_surface() is not None
+    key = (name, flipped, converted, opaque and converted)
+    if key not in _images:
+        img = _load(name, flipped)
+        if converted:
+            img = img.convert() if opaque else img.convert_alpha()
+        _images[key] = img
+    return _images[key]
+
+
+def rotated(name, angle):
+    '''Returns the image rotated by angle degrees. Birds only ever use a
+    handful of tilts, so every rotation is only worked out once'''
+    converted = pygame.display.get_surface() is not None
+    key = (name, angle, converted)
+    if key not in _rotated:
+        _rotated[key] = pygame.transform.rotate(image(name), angle)
+    return _rotated[key]
+
+
+def _load(name, flipped):
+    '''Loads and scales the image without converting it'''
+    key = (name, flipped, False, False)
+    if key not in _images:
+        img = pygame.transform.scale2x(pygame.image.load(os.path.join(IMGS_DIR, name + ".png")))
+        _images[key] = pygame.transform.flip(img, False, True) if flipped else img
+    return _images[key]
+
+
+def mask(name, flipped=False):
+    '''Returns the collision mask of an image. The masks of the SIMULATED
+    images are made from MASKS_FILE rather than the images themselves, so
+    the game can be simulated without the image files'''
+    key = (name, flipped)
+    if key not in _masks:
+        bits = _mask_bits().get(name)
+        if bits is None:
+            _masks[key] = pygame.mask.from_surface(_load(name, flipped))
+        else:
+            _masks[key] = _from_bits(np.flipud(bits) if flipped else bits)
+    return _masks[key]
+
+
+def _mask_bits():
+    '''Returns the solid pixels of every SIMULATED image, reading MASKS_FILE the first time'''
+    global _bits
+    if _bits is None:
+        with np.load(MASKS_FILE) as data:
+            _bits = dict((name, data[name]) for name in data.files)
+    return _bits
+
+
+def _from_bits(bits):
+    '''Returns a Mask of a (height, width) bool array'''
+    height, width = bits.shape
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[:, :, 3] = np.where(bits, 255, 0)
+    return pygame.mask.from_surface(pygame.image.frombuffer(pixels.tobytes(), (width, height), "RGBA"))
+
+
+def save_masks(filename=MASKS_FILE):
+    '''Saves the solid pixels of every SIMULATED image to filename. Run this
+    module to do it again whenever one of those images changes'''
+    bits = {}
+    for name in SIMULATED:
+        image_mask = pygame.mask.from_surface(_load(name, False))
+        width, height = image_mask.get_size()
+        bits[name] = np.array([[image_mask.get_at((x, y)) for x in range(width)] for y in range(height)], dtype=bool)
+    np.savez_compressed(filename, **bits)
+
+
+def size(name):
+    '''Returns the (width, height) of an image'''
+    return mask(name).get_size()
+
+
+def font(size=100):
+    '''Returns the font the score is written in'''
+    if size not in _fonts:
+        pygame.font.init()
+        _fonts[size] = pygame.font.SysFont("comicsans", size)
+    return _fonts[size]
+
+
+@functools.lru_cache(maxsize=4)
+def text(string, size=100, colour=(255, 255, 255)):
+    '''Returns string rendered in the score font. The score only changes when
+    a pipe is passed, so the last few renders are kept and reused'''
+    return font(size).render(string, 1, colour)
+
+
+if __name__ == "__main__":
+    save_masks()
+    print("Saved the masks of {0} to {1}".format(", ".join(SIMULATED), os.path.normpath(MASKS_FILE)))
@@ -0,0 +1,80 @@
+import neat
+import numpy as np
+
+
+class BatchedNetworks():
+    '''Evaluates a whole generation of NEAT feed-forward networks at once.
+    Every network's node evaluations are padded into the same number of steps
+    and links, so each step is a handful of array operations over all the
+    networks instead of a Python walk through every node of every network.
+    Only tanh activation with sum aggregation is supported, which is what
+    config-neat.txt uses'''
+    TOLERANCE = 1e-9 # outputs this close to a decision threshold are rechecked with the network itself
+
+    def __init__(self, networks):
+        self.networks = networks # the neat.nn.FeedForwardNetwork for each row
+        self.num_inputs = len(networks[0].input_nodes) if networks else 0
+        num_outputs = len(networks[0].output_nodes) if networks else 0
+        self.steps = max([len(net.node_evals) for net in networks] + [0]) # node evaluations in the longest network
+        num_links = max([len(links) for net in networks for _, _, _, _, _, links in net.node_evals] + [0])
+        self.zero = self.num_inputs # column that always holds 0, used for padding and outputs that are never evaluated
+
+        # sources are value columns: the inputs, the zero column and then one column per step
+        self.sources = np.full((len(networks), self.steps, num_links), self.zero, dtype=int)
+        self.weights = np.zeros((len(networks), self.steps, num_links))
+        self.bias = np.zeros((len(networks), self.steps))
+        self.response = np.zeros((len(networks), self.steps))
+        self.outputs = np.full((len(networks), num_outputs), self.zero, dtype=int)
+
+        for row, net in enumerate(networks):
+            columns = dict((key, i) for i, key in enumerate(net.input_nodes))
+            for step, (node, act_func, agg_func, bias, response, links) in enumerate(net.node_evals):
+                if act_func is not neat.activations.tanh_activation or agg_func is not neat.aggregations.sum_aggregation:
+                    raise ValueError("Only tanh activation and sum aggregation can be batched")
+                for i, (inode, weight) in enumerate(links):
+                    self.sources[row, step, i] = columns[inode]
+                    self.weights[row, step, i] = weight
+                self.bias[row, step] = bias
+                self.response[row, step] = response
+                columns[node] = self.zero + 1 + step
+            for i, key in enumerate(net.output_nodes):
+                self.outputs[row, i] = columns.get(key, self.zero)
+
+    def __len__(self):
+        return len(self.networks)
+
+    def activate(self, inputs, rows=None):
+        '''Returns the outputs of the networks in rows (all of them by default)
+        for an (N, num_inputs) array of inputs, one row of inputs per network'''
+        if rows is None:
+            rows = np.arange(len(self))
+        inputs = np.asarray(inputs, dtype=float)
+        values = np.zeros((len(rows), self.zero + 1 + self.steps))
+        values[:, :self.num_inputs] = inputs
+        every = np.arange(len(rows))
+
+        for step in range(self.steps):
+            sources = self.sources[rows, step]
+            weights = self.weights[rows, step]
+            # add the links up one at a time, in the same order as the network's own sum
+            total = np.zeros(len(rows))
+            for i in range(sources.shape[1]):
+                total = total + values[every, sources[:, i]] * weights[:, i]
+            z = self.bias[rows, step] + self.response[rows, step] * total
+            values[:, self.zero + 1 + step] = np.tanh(np.clip(2.5 * z, -60.0, 60.0)) # same as neat's tanh_activation
+
+        return values[every[:, None], self.outputs[rows]]
+
+    def decide(self, inputs, rows=None, threshold=0.5):
+        '''Returns a bool array of whether the first output of each network in
+        rows is above threshold. np.tanh can differ from math.tanh in the last
+        bit, so outputs right at the threshold are recomputed with the network's
+        own activate to give exactly the same decisions'''
+        if rows is None:
+            rows = np.arange(len(self))
+        inputs = np.asarray(inputs, dtype=float)
+        output = self.activate(inputs, rows)[:, 0]
+        decisions = output > threshold
+        for i in np.flatnonzero(np.abs(output - threshold) < self.TOLERANCE):
+            decisions[i] = self.networks[rows[i]].activate(tuple(inputs[i]))[0] > threshold
+        return decisions
@@ -0,0 +1,268 @@
+'''Measures how fast the game and training run. Every component is timed on
+fixed seeds at several population sizes and the results are printed as JSON.
+A run can be saved as a baseline and later runs compared against it, failing
+when throughput drops by more than the tolerance.
+
+    python3 bench.py --save-baseline bench_baseline.json
+    python3 bench.py --baseline bench_baseline.json --tolerance 0.2
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # draw_window needs a display, so use a fake one when there isn't a real one
+
+import neat
+import numpy as np
+import pygame
+
+import AI_flappy_bird
+from batch_network import BatchedNetworks
+from course import Course, make_courses
+from env import FlappyEnv
+from flock import Flock
+import game
+from speciation import CachedSpeciesSet
+from training import TrainingSettings
+
+POP_SIZES = [20, 200, 2000]
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config-neat.txt')
+
+
+def rate(func, count, min_time):
+    '''Calls func until at least min_time seconds have passed and returns how
+    many units of work were done per second, where every call does count units'''
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls * count / elapsed
+
+
+def load_config(max_frames):
+    '''Loads the NEAT config with a frame budget so every generation has a bounded length'''
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, CachedSpeciesSet, neat.DefaultStagnation, CONFIG_FILE)
+    config.training = TrainingSettings(CONFIG_FILE)
+    config.training.max_frames = max_frames
+    config.training.stop_at_threshold = False
+    return config
+
+
+def make_genomes(config, size, seed):
+    '''Returns size (genome id, genome) tuples with a few mutations each, the same for the same seed'''
+    random.seed(seed)
+    genomes = []
+    for i in range(size):
+        g = neat.DefaultGenome(i)
+        g.configure_new(config.genome_config)
+        for _ in range(5):
+            g.mutate(config.genome_config)
+        genomes.append((i, g))
+    return genomes
+
+
+def make_flock(size, rng):
+    '''Returns a Flock spread out over the screen'''
+    birds = Flock(size, game.WIN_WIDTH/2-25, 0, game.Bird.IMGS, game.pipe_collisions())
+    birds.y[:] = rng.uniform(0, game.WIN_HEIGHT-150, size)
+    birds.height[:] = birds.y
+    return birds
+
+
+def bench_bird_move(size, config, seed, min_time):
+    birds = [game.Bird(game.WIN_WIDTH/2-25, game.WIN_HEIGHT/2-100) for _ in range(size)]
+
+    def step():
+        for bird in birds:
+            bird.move()
+            if bird.tick_count > 10:
+                bird.jump()
+    return {"bird_steps_per_sec": rate(step, size, min_time)}
+
+
+def bench_flock_move(size, config, seed, min_time):
+    birds = Flock(size, game.WIN_WIDTH/2-25, game.WIN_HEIGHT/2-100, game.Bird.IMGS, game.pipe_collisions())
+
+    def step():
+        birds.move()
+        birds.jump(birds.tick_count > 10)
+        birds.animate()
+    return {"bird_steps_per_sec": rate(step, size, min_time)}
+
+
+def bench_pipe_collision(size, config, seed, min_time):
+    rng = np.random.default_rng(seed)
+    birds = []
+    for y in rng.uniform(0, game.WIN_HEIGHT-150, size):
+        birds.append(game.Bird(game.WIN_WIDTH/2-25, y))
+    pipe = game.Pipe(game.WIN_WIDTH/2-50, 250) # level with the birds, so every check reaches the pixel test
+
+    def step():
+        for bird in birds:
+            pipe.collision(bird)
+    return {"checks_per_sec": rate(step, size, min_time)}
+
+
+def bench_flock_collide(size, config, seed, min_time):
+    birds = make_flock(size, np.random.default_rng(seed))
+    pipe = game.Pipe(game.WIN_WIDTH/2-50, 250)
+    return {"checks_per_sec": rate(lambda: birds.collide(pipe), size, min_time)}
+
+
+def bench_base_move(size, config, seed, min_time):
+    base = game.Base()
+    return {"moves_per_sec": rate(base.move, 1, min_time)}
+
+
+def bench_activate(size, config, seed, min_time):
+    networks = [neat.nn.FeedForwardNetwork.create(g, config) for _, g in make_genomes(config, size, seed)]
+    inputs = [tuple(x) for x in np.random.default_rng(seed).uniform(0, game.WIN_HEIGHT, (size, 3))]
+
+    def step():
+        for network, x in zip(networks, inputs):
+            network.activate(x)
+    return {"activations_per_sec": rate(step, size, min_time)}
+
+
+def bench_batched_activate(size, config, seed, min_time):
+    networks = BatchedNetworks([neat.nn.FeedForwardNetwork.create(g, config) for _, g in make_genomes(config, size, seed)])
+    inputs = np.random.default_rng(seed).uniform(0, game.WIN_HEIGHT, (size, 3))
+    return {"activations_per_sec": rate(lambda: networks.decide(inputs), size, min_time)}
+
+
+def bench_draw_window(size, config, seed, min_time):
+    window = pygame.display.set_mode((game.WIN_WIDTH, game.WIN_HEIGHT))
+    birds = make_flock(size, np.random.default_rng(seed))
+    base = game.Base()
+    pipes = [game.Pipe(game.WIN_WIDTH, 250), game.Pipe(game.WIN_WIDTH/2, 150)]
+    return {"frames_per_sec": rate(lambda: game.draw_window(window, base, birds, pipes, 0), 1, min_time)}
+
+
+def bench_dirty_draw_window(size, config, seed, min_time):
+    window = pygame.display.set_mode((game.WIN_WIDTH, game.WIN_HEIGHT))
+    birds = make_flock(size, np.random.default_rng(seed))
+    base = game.Base()
+    pipes = [game.Pipe(game.WIN_WIDTH, 250), game.Pipe(game.WIN_WIDTH/2, 150)]
+    drawn = [game.draw_window(window, base, birds, pipes, 0)]
+
+    def frame():
+        # only redraws what changed since the last frame, like main does
+        base.move()
+        drawn[0] = game.draw_window(window, base, birds, pipes, 0, drawn[0])
+    return {"frames_per_sec": rate(frame, 1, min_time)}
+
+
+def bench_generation(size, config, seed, min_time):
+    genomes = make_genomes(config, size, seed)
+    course = Course(seed)
+    frames = []
+
+    def generation():
+        frames.append(AI_flappy_bird.main(genomes, config, headless=True, courses=[course])[0])
+    generations_per_sec = rate(generation, 1, min_time)
+    return {"generations_per_sec": generations_per_sec, "frames_per_sec": generations_per_sec * np.mean(frames)}
+
+
+def bench_multi_course_generation(size, config, seed, min_time):
+    genomes = make_genomes(config, size, seed)
+    courses = make_courses(3, seed)
+    frames = []
+
+    def generation():
+        # every genome plays all three courses in the same game loop
+        frames.append(AI_flappy_bird.main(genomes, config, headless=True, courses=courses)[0])
+    generations_per_sec = rate(generation, 1, min_time)
+    return {"generations_per_sec": generations_per_sec, "frames_per_sec": generations_per_sec * np.mean(frames)}
+
+
+def bench_env_step(size, config, seed, min_time):
+    env = FlappyEnv(size)
+    course = Course(seed)
+    env.reset(courses=[course]*size) # every bird on one course, like a generation
+    rng = np.random.default_rng(seed)
+
+    def step():
+        env.step(rng.random(size) < 0.05)
+        if env.dones().all():
+            env.reset(courses=[course]*size)
+    return {"bird_steps_per_sec": rate(step, size, min_time)}
+
+
+COMPONENTS = {
+    "bird_move": bench_bird_move,
+    "flock_move": bench_flock_move,
+    "pipe_collision": bench_pipe_collision,
+    "flock_collide": bench_flock_collide,
+    "base_move": bench_base_move,
+    "activate": bench_activate,
+    "batched_activate": bench_batched_activate,
+    "draw_window": bench_draw_window,
+    "dirty_draw_window": bench_dirty_draw_window,
+    "env_step": bench_env_step,
+    "generation": bench_generation,
+    "multi_course_generation": bench_multi_course_generation,
+}
+
+
+def run_benchmarks(components, sizes, seed=0, min_time=0.5, max_frames=1000):
+    '''Runs the named components at every population size and returns the results'''
+    config = load_config(max_frames)
+    results = {}
+    for name in components:
+        results[name] = {}
+        for size in sizes:
+            results[name][str(size)] = COMPONENTS[name](size, config, seed, min_time)
+    return {
+        "meta": {"python": platform.python_version(), "pygame": pygame.version.ver, "numpy": np.__version__,
+                 "seed": seed, "min_time": min_time, "max_frames": max_frames},
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    '''Returns a description of every throughput in current that is more than
+    tolerance (a fraction) below the same throughput in baseline'''
+    regressions = []
+    for name, by_size in baseline["results"].items():
+        for size, metrics in by_size.items():
+            for metric, before in metrics.items():
+                after = current["results"].get(name, {}).get(size, {}).get(metric)
+                if after is not None and after < before * (1 - tolerance):
+                    regressions.append("{}[{}] {}: {:.4g} -> {:.4g} ({:+.1%})".format(name, size, metric, before, after, after/before - 1))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Flappy Bird simulation, networks, collisions and rendering")
+    parser.add_argument("--components", nargs="+", choices=sorted(COMPONENTS), default=list(COMPONENTS), help="components to benchmark (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=POP_SIZES, help="population sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the genomes, birds and course")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to time each measurement for")
+    parser.add_argument("--max-frames", type=int, default=1000, help="frame budget of a benchmarked generation")
+    parser.add_argument("--output", help="write the results to this file as well as printing them")
+    parser.add_argument("--save-baseline", help="save the results as the baseline in this file")
+    parser.add_argument("--baseline", help="compare the results against the baseline in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="fraction of throughput that may be lost before failing")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.components, args.sizes, args.seed, args.min_time, args.max_frames)
+    print(json.dumps(results, indent=2))
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("regression: " + regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
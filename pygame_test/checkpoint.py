@@ -0,0 +1,162 @@
+import glob
+import gzip
+import os
+import pickle
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from itertools import count
+
+import neat
+from neat.reporting import BaseReporter
+
+
+class BackgroundCheckpointer(BaseReporter):
+    '''Saves the population every generation_interval generations without
+    holding up training. The state is pickled at the end of the generation,
+    which is quick, and then compressed and written to disk by a background
+    thread while the next generation plays. Only the newest keep checkpoints
+    are kept, and each one is written to a temporary file first so a
+    checkpoint on disk is always complete. Only this run's checkpoints are
+    ever deleted: with resume the checkpoints already in directory are taken
+    to be this run's, and otherwise directory must not hold any'''
+
+    def __init__(self, generation_interval=5, directory="checkpoints", keep=3, compresslevel=6, resume=False):
+        existing = checkpoints(directory)
+        if existing and not resume:
+            raise FileExistsError("{0} already holds checkpoints of another run, resume from them or pick another directory".format(directory))
+        self.generation_interval = generation_interval
+        self.directory = directory
+        self.keep = keep # how many of the newest checkpoints to keep (0 keeps all of them)
+        self.compresslevel = compresslevel
+        self.written = existing[::-1] # this run's checkpoints, oldest first
+        self.generation = None
+        self.best_genome = None # fittest genome seen so far, saved so a resumed run still knows it
+        self.jobs = queue.Queue() # (filename, pickled state, seconds spent pickling) waiting to be written
+        self.finished = queue.Queue() # messages about writes the background thread has finished
+        self.writer = threading.Thread(target=self._write_jobs, daemon=True)
+        self.writer.start()
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            self.best_genome = best_genome
+
+    def end_generation(self, config, population, species_set):
+        self._report()
+        if (self.generation + 1) % self.generation_interval == 0:
+            self.save(population, species_set, self.generation + 1)
+
+    def save(self, population, species_set, generation):
+        '''Pickles the population that will play generation and queues it to be written'''
+        start = time.perf_counter()
+        # the species set holds the reporters (this one included), so only its species are saved
+        state = {"generation": generation, "population": population, "species": species_set.species,
+                 "genome_to_species": species_set.genome_to_species, "best_genome": self.best_genome,
+                 "random": random.getstate()}
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        filename = os.path.join(self.directory, "checkpoint-{0}.gz".format(generation))
+        self.jobs.put((filename, data, time.perf_counter()-start))
+
+    def close(self):
+        '''Waits for the queued checkpoints to be written and reports them'''
+        self.jobs.join()
+        self._report()
+
+    def _write_jobs(self):
+        '''Runs in the background thread: compresses and writes queued checkpoints'''
+        while True:
+            filename, data, pickle_time = self.jobs.get()
+            try:
+                start = time.perf_counter()
+                os.makedirs(self.directory, exist_ok=True)
+                # zlib lets go of the GIL while it compresses, so this runs alongside the game
+                with open(filename + ".tmp", "wb") as f:
+                    f.write(gzip.compress(data, self.compresslevel))
+                os.replace(filename + ".tmp", filename)
+                if filename in self.written:
+                    self.written.remove(filename)
+                self.written.append(filename)
+                self._rotate()
+                self.finished.put("Saved checkpoint {0} ({1:.1f} KB from {2:.1f} KB pickled): {3:.1f} ms pickling, {4:.1f} ms writing in the background".format(
+                    filename, os.path.getsize(filename)/1024, len(data)/1024, pickle_time*1000, (time.perf_counter()-start)*1000))
+            except OSError as e:
+                self.finished.put("Could not save checkpoint {0}: {1}".format(filename, e))
+            finally:
+                self.jobs.task_done()
+
+    def _rotate(self):
+        '''Deletes all but the newest keep checkpoints this run has written'''
+        while self.keep and len(self.written) > self.keep:
+            os.remove(self.written.pop(0))
+
+    def _report(self):
+        '''Prints the checkpoints written since the last report'''
+        while not self.finished.empty():
+            print(self.finished.get())
+
+
+def run_directory(parent="checkpoints"):
+    '''Makes and returns a new directory in parent for a run's checkpoints,
+    named after when the run started so they sort oldest first'''
+    name = os.path.join(parent, time.strftime("run-%Y%m%d-%H%M%S"))
+    directory = name
+    for i in count(2):
+        try:
+            os.makedirs(directory)
+            return directory
+        except FileExistsError:
+            # another run started in the same second
+            directory = "{0}-{1:d}".format(name, i)
+
+
+def latest_run(parent="checkpoints"):
+    '''Returns the newest run directory in parent that holds checkpoints, or None'''
+    for directory in sorted(glob.glob(os.path.join(parent, "run-*")), reverse=True):
+        if checkpoints(directory):
+            return directory
+    return None
+
+
+def checkpoints(directory):
+    '''Returns the checkpoints in directory, newest first'''
+    def generation(filename):
+        return int(re.search(r"checkpoint-(\d+)\.gz$", filename).group(1))
+    return sorted(glob.glob(os.path.join(directory, "checkpoint-*.gz")), key=generation, reverse=True)
+
+
+def restore(filename, config):
+    '''Returns a Population that carries on from the checkpoint, using config
+    (so changes to the config file since the checkpoint take effect)'''
+    with gzip.open(filename) as f:
+        state = pickle.load(f)
+    random.setstate(state["random"])
+    population = state["population"]
+    pop = neat.Population(config, (population, None, state["generation"]))
+    pop.species = config.species_set_type(config.species_set_config, pop.reporters)
+    pop.species.species = state["species"]
+    pop.species.genome_to_species = state["genome_to_species"]
+    # carry on numbering after the newest genome and species, rather than from 1
+    pop.species.indexer = count(max(state["species"], default=0) + 1)
+    pop.reproduction.genome_indexer = count(max(population, default=0) + 1)
+    pop.best_genome = state["best_genome"]
+    return pop
+
+
+def restore_latest(directory, config):
+    '''Returns a Population restored from the newest checkpoint in directory
+    that can be read, or None if there isn't one'''
+    for filename in checkpoints(directory):
+        try:
+            pop = restore(filename, config)
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError) as e:
+            print("Skipping unreadable checkpoint {0}: {1}".format(filename, e))
+            continue
+        print("Resuming from checkpoint {0}".format(filename))
+        return pop
+    return None
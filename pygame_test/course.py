@@ -0,0 +1,32 @@
+import random
+
+
+class Course():
+    '''Represents the sequence of pipe heights a game is played on. Heights are
+    drawn lazily from a generator seeded with the course's seed and remembered,
+    so the same seed always gives the same pipes and a course can be shared by
+    any number of games without being generated again'''
+    MIN_HEIGHT = 80 # lowest height a pipe can have
+    MAX_HEIGHT = 450 # pipes are always lower than this
+
+    def __init__(self, seed=None):
+        if seed is None:
+            # pick a seed with the global generator so random.seed still decides the course
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.heights = [] # heights of the pipes generated so far
+
+    def height(self, index):
+        '''Returns the height of the pipe at position index along the course'''
+        while len(self.heights) <= index:
+            self.heights.append(self.rng.randrange(self.MIN_HEIGHT, self.MAX_HEIGHT))
+        return self.heights[index]
+
+
+def make_courses(count, seed=None):
+    '''Returns count courses to be played together. With a seed the same
+    seed always gives the same courses, the first of which is Course(seed)'''
+    if seed is None:
+        return [Course() for _ in range(count)]
+    return [Course(seed + i) for i in range(count)]
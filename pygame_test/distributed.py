@@ -0,0 +1,220 @@
+'''Spreads the evaluation of each generation over worker processes on other
+machines. Training started with --listen hands out chunks of genomes over
+TCP to whichever workers are connected, and every worker simulates its
+chunks headless and sends back their fitness:
+
+    python3 AI_flappy_bird.py --listen 0.0.0.0:6000 --authkey secret
+    python3 distributed.py trainer-host:6000 --processes 4 --authkey secret
+
+Chunks are pickled, so only connect machines you trust. Workers can join
+or leave at any time: the chunks a worker had when it disconnected go back
+in the queue for the others, and a worker that loses its connection
+connects again. A chunk that fails on max_attempts workers fails the
+generation rather than taking down every worker in turn.
+'''
+import argparse
+import itertools
+import math
+import queue
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client, Listener
+
+from course import Course, make_courses
+from training import TrainingSettings
+
+
+def parse_address(address):
+    '''Turns "host:port" into a (host, port) tuple'''
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port))
+
+
+class DistributedEvaluator():
+    '''Evaluates each generation's genomes on remote workers. Works like
+    PoolEvaluator, except the genomes are sent over TCP in chunks to
+    every worker that connects to address, a chunk at a time, so faster
+    machines simply take more chunks. All the chunks of a generation play
+    the same courses, and only the courses' seeds are sent, so a genome's
+    fitness is the same whichever worker plays it'''
+
+    def __init__(self, address, authkey, chunk_size=None, courses=None, timeout=None, max_attempts=3):
+        '''Without a chunk_size each generation is split into two chunks per
+        connected worker. Without courses every generation plays
+        config.training.courses new random ones. A worker that takes longer
+        than timeout seconds over a chunk is dropped and the chunk handed to
+        another worker, up to max_attempts times in all'''
+        self.chunk_size = chunk_size
+        self.courses = courses
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address # the address actually listened on, in case port 0 picked one
+        self.jobs = queue.Queue() # (job id, genomes, config, course seeds) waiting for a worker
+        self.results = {} # job id -> fitness of the job's genomes, or None if it failed
+        self.failures = {} # job id -> why the job failed every time it was tried
+        self.attempts = {} # job id -> times the job has failed so far
+        self.finished = threading.Condition()
+        self.job_ids = itertools.count()
+        self.workers = 0 # workers connected right now
+        self.closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def evaluate(self, genomes, config):
+        '''Fitness function to pass to Population.run'''
+        courses = self.courses
+        if courses is None:
+            training = getattr(config, 'training', None) or TrainingSettings()
+            courses = make_courses(training.courses)
+        seeds = [course.seed for course in courses]
+        chunk_size = self.chunk_size or max(1, math.ceil(len(genomes)/(2*max(1, self.workers))))
+        chunks = {}
+        for i in range(0, len(genomes), chunk_size):
+            job_id = next(self.job_ids)
+            chunks[job_id] = genomes[i:i+chunk_size]
+            self.jobs.put((job_id, chunks[job_id], config, seeds))
+
+        if not self.workers:
+            print("Waiting for workers to connect to {0}:{1}".format(*self.address))
+        # wait for every chunk, then assign the fitness back to each genome
+        with self.finished:
+            self.finished.wait_for(lambda: all(job_id in self.results for job_id in chunks))
+            results = [self.results.pop(job_id) for job_id in chunks]
+            failures = [self.failures.pop(job_id) for job_id in chunks if job_id in self.failures]
+        if failures:
+            raise RuntimeError("{0:d} of {1:d} chunks failed on {2:d} workers each, the first with:\n{3}".format(
+                len(failures), len(chunks), self.max_attempts, failures[0]))
+        for chunk, fitnesses in zip(chunks.values(), results):
+            for (_, genome), fitness in zip(chunk, fitnesses):
+                genome.fitness = fitness
+
+    def close(self):
+        '''Stops accepting workers and tells the connected ones to stop'''
+        self.closed = True
+        self.listener.close()
+        for _ in range(self.workers):
+            self.jobs.put(None)
+
+    def _accept(self):
+        '''Runs in the background: starts serving every worker that connects'''
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (OSError, AuthenticationError):
+                # the listener was closed, or a worker failed the authentication
+                continue
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection):
+        '''Runs in the background for every worker: sends it one job at a time
+        until it disconnects, putting the job it had back in the queue'''
+        with self.finished:
+            self.workers += 1
+            print("Worker connected, {0:d} now".format(self.workers))
+        job = None
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    # training has finished
+                    connection.send(None)
+                    break
+                connection.send(job)
+                if self.timeout is not None and not connection.poll(self.timeout):
+                    raise TimeoutError("worker took more than {0} seconds".format(self.timeout))
+                job_id, fitness, error = connection.recv()
+                if error is None:
+                    with self.finished:
+                        self.results[job_id] = fitness
+                        self.attempts.pop(job_id, None)
+                        self.finished.notify_all()
+                else:
+                    self._failed(job, error)
+                job = None
+        except (EOFError, OSError) as e:
+            # TimeoutError is an OSError too
+            reason = "Worker disconnected ({0})".format(str(e) or type(e).__name__)
+            print(reason)
+            if job is not None:
+                self._failed(job, reason)
+        finally:
+            connection.close()
+            with self.finished:
+                self.workers -= 1
+
+
+    def _failed(self, job, reason):
+        '''Puts a job that failed back in the queue, or gives up on it once
+        it has failed max_attempts times'''
+        job_id = job[0]
+        with self.finished:
+            self.attempts[job_id] = self.attempts.get(job_id, 0) + 1
+            if self.attempts[job_id] < self.max_attempts:
+                self.jobs.put(job)
+                return
+            del self.attempts[job_id]
+            self.failures[job_id] = reason
+            self.results[job_id] = None
+            self.finished.notify_all()
+
+
+def connect(address, authkey, retry):
+    '''Returns a connection to the coordinator at address, trying for up to
+    retry seconds in case it hasn't started listening yet'''
+    deadline = time.monotonic() + retry
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def worker(address, authkey, retry=30):
+    '''Connects to the coordinator at address and evaluates the chunks it
+    sends until training finishes. Keeps trying to connect for up to retry
+    seconds, so workers can be started before training, and connects again
+    whenever the connection is lost. A chunk that raises is reported back
+    to the coordinator instead of stopping the worker'''
+    from AI_flappy_bird import eval_genomes # imported here since the game imports this module
+
+    while True:
+        try:
+            with connect(address, authkey, retry) as connection:
+                while True:
+                    job = connection.recv()
+                    if job is None:
+                        # training has finished
+                        return
+                    job_id, genomes, config, seeds = job
+                    try:
+                        fitness = eval_genomes(genomes, config, [Course(seed) for seed in seeds])
+                    except Exception:
+                        connection.send((job_id, None, traceback.format_exc()))
+                        continue
+                    connection.send((job_id, fitness, None))
+        except (EOFError, OSError) as e:
+            if isinstance(e, ConnectionRefusedError):
+                # the coordinator has gone for good
+                raise
+            # dropped by the coordinator (e.g. for taking too long) or the network failed
+            print("Lost the connection ({0}), connecting again".format(str(e) or type(e).__name__))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate genomes for a training run started with --listen")
+    parser.add_argument("address", help="host:port the training run is listening on")
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes to run on this machine")
+    parser.add_argument("--authkey", required=True, help="shared secret the training run was started with")
+    parser.add_argument("--retry", type=float, default=30, help="seconds to keep trying to connect for")
+    args = parser.parse_args()
+
+    address = parse_address(args.address)
+    processes = [Process(target=worker, args=(address, args.authkey.encode(), args.retry)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
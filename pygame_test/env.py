@@ -0,0 +1,155 @@
+'''A vectorized, gym-style environment over the game. Training, the player
+and any other trainer all drive the same engine through it:
+
+    env = FlappyEnv(64)
+    observations = env.reset(seed=0)
+    while not env.dones().all():
+        observations, rewards, dones = env.step(observations[:, 0] > 300)
+'''
+import numpy as np
+
+import assets
+from course import make_courses
+from flock import Flock
+import game
+
+
+class FlappyEnv():
+    '''Runs num_worlds games of Flappy Bird side by side, with one bird in
+    each, in the style of a vectorized gym environment: reset starts every
+    game and step moves them all on by a frame, given which birds jump.
+    Observations are what the NEAT networks see (the bird's y and its distance
+    to the top and bottom of the next pipe), rewards follow the fitness rules
+    of training, and a world is done once its bird is dead. Worlds playing
+    the same Course share one World, so a whole population on one course runs
+    as a single game with that many birds'''
+    FRAME_REWARD = 0.1 # for every frame a bird is alive
+    PIPE_REWARD = 5 # for every pipe a bird passes
+    COLLISION_REWARD = -1 # for hitting a pipe
+
+    def __init__(self, num_worlds, profiler=None):
+        self.num_worlds = num_worlds
+        self.profiler = profiler # PhaseProfiler lapped at the end of each phase of step, if given
+        self.birds = None # Flock with the bird of every world
+        self.worlds = [] # the World of each course being played
+        self.world_of = None # index into worlds of the course each world is playing
+        self.base = None
+        self.frames = 0
+
+    def reset(self, seed=None, courses=None):
+        '''Starts every game again and returns the first observations. courses
+        is the Course each world plays, and worlds given the same Course play
+        it together. Without courses every world gets its own new course, the
+        same ones every time for the same seed'''
+        if courses is None:
+            courses = make_courses(self.num_worlds, seed)
+        if len(courses) != self.num_worlds:
+            raise ValueError("Expected {0:d} courses, got {1:d}".format(self.num_worlds, len(courses)))
+        playing = {} # id of each course -> the course and the worlds playing it
+        for i, course in enumerate(courses):
+            playing.setdefault(id(course), (course, []))[1].append(i)
+        self.worlds = [game.World(course, np.array(members)) for course, members in playing.values()]
+        self.world_of = np.zeros(self.num_worlds, dtype=int)
+        for i, world in enumerate(self.worlds):
+            self.world_of[world.members] = i
+        # all the birds start in the middle
+        self.birds = Flock(self.num_worlds, game.WIN_WIDTH/2-25, game.WIN_HEIGHT/2-100, game.Bird.IMGS, game.pipe_collisions())
+        self.base = game.Base()
+        self.frames = 0
+        return self.observations()
+
+    def observations(self):
+        '''Returns an (num_worlds, 3) array of every bird's y position, distance
+        to the top pipe in the y axis and distance to the bottom pipe'''
+        next_pipes = [world.next_pipe() for world in self.worlds]
+        tops = np.array([pipe.height for pipe in next_pipes])[self.world_of]
+        bottoms = np.array([pipe.bottom for pipe in next_pipes])[self.world_of]
+        y = self.birds.y
+        return np.column_stack((y, np.abs(y-tops), np.abs(y-bottoms)))
+
+    def dones(self):
+        '''Returns a bool array of the worlds whose bird is dead'''
+        return ~self.birds.alive
+
+    def scores(self):
+        '''Returns the number of pipes passed on the course of every world'''
+        return np.array([world.score for world in self.worlds])[self.world_of]
+
+    def world(self, index):
+        '''Returns the World the bird of world index is playing in'''
+        return self.worlds[self.world_of[index]]
+
+    def jump(self, actions):
+        '''Makes the live birds selected by the bool array actions jump right
+        away, so they go up on the next step, the way a player's tap does'''
+        self.birds.jump(np.asarray(actions, dtype=bool) & self.birds.alive)
+
+    def step(self, actions):
+        '''Moves every game on by a frame. The live birds selected by the bool
+        array actions jump once they have moved, the way the NEAT birds always
+        have. Returns the observations, rewards and dones after the frame'''
+        birds = self.birds
+        profiler = self.profiler
+        rewards = np.zeros(self.num_worlds)
+        self.base.move()
+        birds.move()
+        rewards[birds.alive] += self.FRAME_REWARD
+        birds.jump(np.asarray(actions, dtype=bool) & birds.alive)
+        if profiler is not None:
+            profiler.lap("movement")
+        pipe_width = assets.size("pipe")[0]
+        for world in self.worlds:
+            if not birds.alive[world.members].any():
+                # every bird on this course is dead, so its pipes can stay where they are
+                continue
+            add_pipe = False
+            pipes_to_remove = []
+            for pipe in world.pipes:
+                # for every bird on this course, check if it has collided with a pipe
+                collided = birds.collide(pipe, world.members)
+                rewards[collided] += self.COLLISION_REWARD
+                birds.kill(collided)
+                if pipe.x + pipe_width < birds.x and not pipe.passed:
+                    # case where a bird flies up off the game screen and passes a pipe,
+                    # it should collide
+                    living = birds.living(world.members)
+                    birds.kill(living[birds.y[living] < 0])
+                    if birds.alive[world.members].any():
+                        # if pipe has passed the birds, need to draw another pipe
+                        # add one to the score
+                        pipe.passed = True
+                        add_pipe = True
+                        world.score += 1
+                if pipe.x + pipe_width <= 0:
+                    # if the pipe has moved off the screen need to remove the pipe
+                    pipes_to_remove.append(pipe)
+                pipe.move()
+            if profiler is not None:
+                profiler.lap("pipe collision")
+            if add_pipe:
+                # create a new pipe if the birds have passed one
+                # and reward the birds still alive
+                rewards[birds.living(world.members)] += self.PIPE_REWARD
+                world.add_pipe()
+            for pipe in pipes_to_remove:
+                # remove pipes that have gone off the screen
+                world.pipes.remove(pipe)
+            if profiler is not None:
+                profiler.lap("pipes")
+        # check if each bird has hit the ground. Remove if they have
+        birds.kill(self.base.collision(birds))
+        if profiler is not None:
+            profiler.lap("base collision")
+        # the current image decides the collision masks, so the birds flap whether they are drawn or not
+        birds.animate()
+        self.frames += 1
+        return self.observations(), rewards, self.dones()
+
+    def draw(self, window, previous=None, shown=None, index=0):
+        '''Draws the course world index is playing, with the birds in shown
+        (by default every live bird on that course), and returns the rects
+        drawn. previous is passed on to draw_window'''
+        world = self.world(index)
+        if shown is None:
+            shown = self.birds.living(world.members)
+        return game.draw_window(window, self.base, self.birds, world.pipes, world.score, previous, shown)
@@ -0,0 +1,139 @@
+import numpy as np
+
+import assets
+import physics
+
+
+class CollisionTable():
+    '''Answers pipe collision checks for many birds at once. For a given bird
+    image and horizontal offset to the pipe, whether the masks overlap only
+    depends on the vertical offset, so each of those rows is worked out once
+    with pygame's own mask test and then looked up for every bird'''
+
+    def __init__(self, bird_masks, pipe_top_mask, pipe_bottom_mask):
+        self.bird_masks = bird_masks
+        self.pipe_masks = [pipe_top_mask, pipe_bottom_mask]
+        self.bird_width, self.bird_height = bird_masks[0].get_size()
+        self.pipe_width, self.pipe_height = pipe_top_mask.get_size()
+        self.rows = {} # (bird image, pipe image, x offset) -> overlap for every y offset
+
+    def row(self, img_index, pipe_index, dx):
+        '''Returns whether the bird and pipe overlap for every y offset where they can touch'''
+        key = (img_index, pipe_index, dx)
+        if key not in self.rows:
+            bird_mask = self.bird_masks[img_index]
+            pipe_mask = self.pipe_masks[pipe_index]
+            dys = range(1-self.pipe_height, self.bird_height)
+            self.rows[key] = np.array([bird_mask.overlap(pipe_mask, (dx, dy)) is not None for dy in dys], dtype=bool)
+        return self.rows[key]
+
+    def collide(self, img_index, dx, top_dy, bottom_dy):
+        '''Returns a bool array of which birds overlap the pipe. dx, top_dy and
+        bottom_dy are the mask offsets used by Pipe.collision and img_index is
+        the image each bird is showing'''
+        hits = np.zeros(len(img_index), dtype=bool)
+        if dx <= -self.pipe_width or dx >= self.bird_width:
+            # the pipe is not level with the birds, so nothing can overlap
+            return hits
+        for pipe_index, dy in enumerate((top_dy, bottom_dy)):
+            in_reach = (dy > -self.pipe_height) & (dy < self.bird_height)
+            for i in range(len(self.bird_masks)):
+                sel = in_reach & (img_index == i)
+                if sel.any():
+                    hits[sel] |= self.row(i, pipe_index, dx)[dy[sel] + self.pipe_height - 1]
+        return hits
+
+
+class Flock():
+    '''Represents a whole population of birds. Every bird's state is kept in
+    NumPy arrays so the population moves, animates and collides with whole-array
+    operations, and dead birds are tracked with the alive mask'''
+    # same movement constants as Bird
+    MAX_ROTATION = physics.MAX_ROTATION # how much the birds can rotate
+    ROT_VEL = physics.ROT_VEL # how fast the birds rotate
+    ANIMATION_TIME = 5 # how fast the animation changes between the bird images
+
+    def __init__(self, size, x, y, imgs, collisions):
+        self.x = x # all birds share the same position in the x axis
+        self.y = np.full(size, y, dtype=float) # birds' positions in the y axis
+        self.tilt = np.zeros(size, dtype=int) # direction the birds are pointing in
+        self.tick_count = np.zeros(size, dtype=int) # ticks since each bird's last jump
+        self.arc = np.zeros(size, dtype=int) # where each bird's displacements start in physics.DISPLACEMENTS
+        self.height = self.y.copy() # where each bird jumped from
+        self.img_count = np.zeros(size, dtype=int)
+        self.img_index = np.zeros(size, dtype=int) # which of the images each bird is showing
+        self.alive = np.ones(size, dtype=bool)
+        self.imgs = imgs # names of the bird images
+        self.collisions = collisions # CollisionTable for these bird images
+
+    def __len__(self):
+        return len(self.y)
+
+    def jump(self, jumping):
+        '''Makes the birds selected by the bool array jumping go upwards'''
+        self.arc[jumping] = physics.JUMP_OFFSET
+        self.tick_count[jumping] = 0
+        self.height[jumping] = self.y[jumping]
+
+    def move(self):
+        '''Moves and tilts every bird the same way Bird.move does. Dead birds are
+        moved as well since that is cheaper than selecting the live ones'''
+        self.tick_count += 1
+        # the displacement only depends on the ticks since the last jump, so it is looked up
+        displacement = physics.DISPLACEMENTS.take(self.arc + np.minimum(self.tick_count, physics.LAST_TICK))
+        self.y += displacement
+
+        # tilt up when moving upwards or just after a jump, otherwise keep turning down
+        looking_up = (displacement < 0) | (self.y < self.height + 50)
+        self.tilt = np.where(looking_up, np.where(self.tilt < self.MAX_ROTATION, self.MAX_ROTATION, self.tilt),
+                             np.where(self.tilt > -90, self.tilt - self.ROT_VEL, self.tilt))
+
+    def animate(self):
+        '''Advances the flapping animation of every bird the same way Bird.animate does'''
+        self.img_count += 1
+        count = self.img_count
+        t = self.ANIMATION_TIME
+        wings_up = (count < t) | (count == t*4)
+        wings_down = (count >= t*2) & (count < t*3)
+        self.img_index = np.where(wings_up, 0, np.where(wings_down, 2, 1))
+        self.img_count[count == t*4] = 0
+
+        # birds that have been falling for awhile don't flap
+        falling = self.tilt <= -80
+        self.img_index[falling] = 1
+        self.img_count[falling] = t*2
+
+    def draw(self, window, shown=None):
+        '''Draws the birds in shown, by default all the live ones, and returns
+        the rects drawn. Drawing doesn't animate them, animate does'''
+        if shown is None:
+            shown = np.flatnonzero(self.alive)
+        rects = []
+        for i in shown:
+            name = self.imgs[self.img_index[i]]
+            rotated_img = assets.rotated(name, int(self.tilt[i]))
+            rect = rotated_img.get_rect(center=assets.image(name).get_rect(topleft=(self.x, self.y[i])).center)
+            rects.append(window.blit(rotated_img, rect.topleft))
+        return rects
+
+    def living(self, members=None):
+        '''Returns the indexes of the live birds, only looking at the birds
+        indexed by members if given'''
+        if members is None:
+            return np.flatnonzero(self.alive)
+        return members[self.alive[members]]
+
+    def collide(self, pipe, members=None):
+        '''Returns a bool array of the live birds (of those in members, if
+        given) that have hit the pipe'''
+        birds = self.living(members)
+        y = np.round(self.y[birds]).astype(int)
+        hits = self.collisions.collide(self.img_index[birds], int(pipe.x - self.x), pipe.top - y, pipe.bottom - y)
+        collided = np.zeros(len(self), dtype=bool)
+        collided[birds[hits]] = True
+        return collided
+
+    def kill(self, dead):
+        '''Marks the birds selected by dead, a bool array or an array of
+        indexes, as no longer alive'''
+        self.alive[dead] = False
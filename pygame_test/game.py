@@ -0,0 +1,246 @@
+'''The pieces of the game shared by every way of playing it: the Bird, Pipe
+and Base, the World a course is played in, and drawing a frame. env.py
+runs the game on them for both scripts.'''
+import functools
+
+import pygame
+
+import assets
+from flock import CollisionTable
+import physics
+
+WIN_WIDTH = 500
+WIN_HEIGHT = 800
+
+
+@functools.lru_cache(maxsize=None)
+def pipe_collisions():
+    '''Returns the pipe collision lookups shared by every game'''
+    return CollisionTable([assets.mask(img) for img in Bird.IMGS], assets.mask("pipe", flipped=True), assets.mask("pipe"))
+
+
+class Bird():
+    '''Represents a Bird object'''
+    IMGS = ["bird1", "bird2", "bird3"] # names of the wings up, wings parallel and wings down images
+    MAX_ROTATION = 25 # how much the bird can rotate
+    ROT_VEL = 20 # how fast the bird rotates
+    ANIMATION_TIME = 5 # how fast the animation changes between the bird
+
+    def __init__(self, x, y):
+        self.x = x # bird's position in the x axis
+        self.y = y # bird's position in the y axis
+        self.tilt = 0 # the direction the bird is pointing in from -90 (completely down) to MAX_ROTATION (up)
+        self.tick_count = 0  # counting the ticks of the game loop, how many ticks went by since the last jump
+        self.vel = 0 # how fast the bird is travelling
+        self.arc = physics.ARCS[self.vel] # displacement for each tick since the last jump
+        self.height = self.y # keeps track of where the bird jumped from
+        self.img_count = 0
+        self.img = self.IMGS[0]
+
+    def jump(self):
+        '''Changes the bird to go in the upward direction'''
+        self.vel = physics.JUMP_VEL # change the velocity to point up (negative is up)
+        self.arc = physics.ARCS[self.vel]
+        self.tick_count = 0 # reset tick count when jump
+        self.height = self.y # set the height of where we jumped from
+
+    def move(self):
+        '''Calculates how the bird is moving and whether to tilt the bird pointing up or down'''
+        self.tick_count += 1
+        # how many pixels we are moving the bird only depends on the ticks since the last jump,
+        # so it is looked up rather than worked out (see physics.py)
+        tick_count = self.tick_count
+        displacement = self.arc[tick_count] if tick_count <= physics.LAST_TICK else physics.TERMINAL_VEL
+        # change the position in the y axis by the calculated displacement
+        self.y += displacement
+
+        #### to calculate the tilt of the bird ###
+        # if we're moving upwards or have recently jumped, change the tilt of the bird to look up
+        if (displacement < 0) or (self.y < self.height + 50):
+            if self.tilt < self.MAX_ROTATION:
+                # set the tilt of the bird to look up
+                self.tilt = self.MAX_ROTATION
+        # else, then we're moving the downwards so tilt the bird down
+        else:
+            if self.tilt > -90:
+                # if the bird is not tilted completely downwards, keep turning the bird down by the rotational velocity
+                self.tilt -= self.ROT_VEL
+    
+    def animate(self):
+        '''Advances the flapping animation by one frame. The current image also
+        decides the bird's collision mask, so this must run every frame even
+        when nothing is drawn'''
+        self.img_count += 1
+
+        # To animate the bird flapping, change images based on the animation time of the bird
+        # rotates between wings up, wings parallel, and wings down
+        if (self.img_count < self.ANIMATION_TIME) or (self.img_count == self.ANIMATION_TIME*4):
+            # wings up
+            self.img = self.IMGS[0]
+            if (self.img_count == self.ANIMATION_TIME*4):
+                # reset the animation back to 0
+                self.img_count = 0
+        elif (self.img_count < self.ANIMATION_TIME*2) or (self.img_count >= self.ANIMATION_TIME*3 and self.img_count < self.ANIMATION_TIME*4):
+            # wings parallel
+            self.img = self.IMGS[1]
+        elif (self.img_count >= self.ANIMATION_TIME*2) and (self.img_count < self.ANIMATION_TIME*3):
+            # wings down
+            self.img = self.IMGS[2]
+
+        if self.tilt <= -80:
+            # if the bird has been falling for awhile then don't flap
+            self.img = self.IMGS[1]
+            self.img_count = self.ANIMATION_TIME*2
+
+    def draw(self, window):
+        '''Draws and animates the bird flapping, and returns the rect drawn'''
+        self.animate()
+        img = assets.image(self.img)
+        rotated_img = assets.rotated(self.img, self.tilt)
+        rect = rotated_img.get_rect(center=img.get_rect(topleft=(self.x, self.y)).center)
+        return window.blit(rotated_img, rect.topleft)
+
+    def get_mask(self):
+        '''Returns a Mask for the bird'''
+        return assets.mask(self.img)
+
+
+class Pipe():
+    '''Represents a pipe object'''
+    GAP = 190 # the space between the two pipes
+    VEL = 5 # the speed at which the background (pipes and base) moves in the x direction
+
+    def __init__(self, x, height):
+        self.x = x # position of the pipe in the x axis
+        self.height = 0 # the height of the pipe in the y axis
+        self.top = 0 # top of the pipe
+        self.bottom = 0 # bottom of the pipe
+
+        self.passed = False # if bird has passed the pipe
+        self.set_height(height)
+
+    def set_height(self, height):
+        '''Sets the height of the pipe, which comes from the course being played'''
+        self.height = height
+        bottom_pipe_height = WIN_HEIGHT-self.height-self.GAP
+        bottom_pipe_coords = WIN_HEIGHT-bottom_pipe_height
+        self.top = WIN_HEIGHT-self.GAP-bottom_pipe_height-assets.size("pipe")[1]
+        self.bottom = WIN_HEIGHT-bottom_pipe_height
+
+    def draw(self, window):
+        '''Draws the pipe image onto the background window and returns the rects drawn'''
+        pipe_height = assets.size("pipe")[1]
+        bottom_pipe_height = WIN_HEIGHT-self.height-self.GAP
+        bottom_pipe_coords = WIN_HEIGHT-bottom_pipe_height
+        return [window.blit(assets.image("pipe", flipped=True), (self.x, WIN_HEIGHT-self.GAP-bottom_pipe_height-pipe_height)),
+                window.blit(assets.image("pipe"), (self.x, bottom_pipe_coords))]
+
+    def move(self):
+        '''Moves the pipes a fixed distance based on VEL'''
+        self.x -= self.VEL
+
+    def collision(self, bird):
+        '''Determins if the pipe has collided with the bird'''
+        bird_mask = bird.get_mask()
+        top_mask = assets.mask("pipe", flipped=True)
+        bottom_mask = assets.mask("pipe")
+        offset_x = int(self.x - bird.x)
+        if offset_x >= bird_mask.get_size()[0] or offset_x + top_mask.get_size()[0] <= 0:
+            # the pipe is not level with the bird, so the masks can't overlap
+            return False
+        top_mask_offset = (offset_x, self.top - round(bird.y)) 
+        bottom_mask_offset = (offset_x, self.bottom - round(bird.y)) 
+
+        top_overlap = bird_mask.overlap(top_mask, top_mask_offset)
+        bottom_overlap = bird_mask.overlap(bottom_mask, bottom_mask_offset)
+
+        if top_overlap or bottom_overlap:
+            return True
+        else:
+            return False
+
+class Base():
+    '''Represents the base (ground) of the game'''
+    VEL = 5 # the speed at which the background (pipes and base) moves in the x direction
+
+    def __init__(self):
+        self.width = assets.size("base")[0] # the width of the base image
+        self.x = 0 # the position in the x direction where the base starts
+        self.x2 = self.width # position where the second base starts which makes it look like one continuous movement
+        self.y = WIN_HEIGHT-100 # the position in the y direction where the base will be
+
+    def draw(self, window):
+        '''Draws the base on the window in its x and y coordinates and returns the rects drawn'''
+        base = assets.image("base")
+        return [window.blit(base, (self.x, self.y)), window.blit(base, (self.x2, self.y))]
+
+    def move(self):
+        '''Moves the base left by VEL pixels'''
+        self.x -= self.VEL
+        self.x2 -= self.VEL
+        if (self.x + self.width < 0):
+            # if the first base has moved off the screen, redraw it at the end of the second base
+            self.x = self.x2 + self.width
+        if (self.x2 + self.width < 0):
+            # if the second base has moved off the screen
+            self.x2 = self.x + self.width
+
+    def collision(self, bird):
+        '''Determins if the base has collided with the bird'''
+        return bird.y >= self.y-40
+
+    def get_x(self):
+        '''Return the x coordinate of the base'''
+        return self.x
+
+
+class World():
+    '''Represents one course being played by some of the birds in a Flock.
+    Every bird is at the same x, so birds playing the same course all see the
+    same pipes for as long as they live, and can share one World'''
+
+    def __init__(self, course, members):
+        self.course = course
+        self.members = members # indexes of this world's birds in the flock
+        self.pipes = [Pipe(WIN_WIDTH, course.height(0))] # create the first pipe with the first height of the course
+        self.pipe_count = 1 # how many pipes of the course have been created
+        self.score = 0
+
+    def next_pipe(self):
+        '''Returns the pipe the birds should look at when deciding to jump'''
+        return self.pipes[0] if not self.pipes[0].passed else self.pipes[1]
+
+    def add_pipe(self):
+        '''Adds the next pipe of the course at the right of the screen'''
+        self.pipes.append(Pipe(WIN_WIDTH, self.course.height(self.pipe_count)))
+        self.pipe_count += 1
+
+
+def draw_window(window, base, birds, pipes, score, previous=None, shown=None):
+    '''Draws the assets onto the game window and returns the rects drawn. If
+    previous holds the rects returned for the last frame, only those parts of
+    the window are cleared and only they and this frame's rects are updated,
+    instead of the whole window. shown picks which birds are drawn (by default
+    all the live ones)'''
+    background = assets.image("bg", opaque=True)
+    if previous is None:
+        window.blit(background, (0, 0))
+    else:
+        for rect in previous:
+            # cover up what was drawn last frame
+            window.blit(background, rect, rect)
+    rects = []
+    for pipe in pipes:
+        rects += pipe.draw(window)
+    text = assets.text(str(score))
+    rects.append(window.blit(text, (WIN_WIDTH-10-text.get_width(), 10)))
+    rects += base.draw(window)
+    bird_rects = birds.draw(window, shown)
+    if bird_rects:
+        # the birds all share one column, so one rect around them is cheaper than one each
+        rects.append(bird_rects[0].unionall(bird_rects[1:]))
+    if previous is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(previous + rects)
+    return rects
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import neat
+from neat.reporting import BaseReporter
+
+
+def fingerprint(genome):
+    '''Returns a hash of everything about genome that its network depends on:
+    its nodes and connections and all their genes. Elites and other genomes
+    that come through a generation unchanged keep the same fingerprint'''
+    nodes = genome.nodes
+    connections = genome.connections
+    return hash((tuple(nodes), tuple([(n.bias, n.response, n.activation, n.aggregation) for n in nodes.values()]),
+                 tuple(connections), tuple([(c.weight, c.enabled) for c in connections.values()])))
+
+
+class NetworkCache(BaseReporter):
+    '''Keeps the networks of the last maxsize genomes compiled, by their
+    fingerprint, so a genome that carries over unchanged into the next
+    generation isn't compiled again. When every generation plays the same
+    courses it can also keep the fitness each genome got on them, so those
+    genomes aren't played again at all. The least recently used entries are
+    dropped first, and the hit rates are reported every generation'''
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.networks = OrderedDict() # fingerprint -> neat.nn.FeedForwardNetwork
+        self.fitness = OrderedDict() # (fingerprint, course seeds) -> fitness
+        self.hits = 0 # networks found in the cache this generation
+        self.misses = 0
+        self.reused = 0 # genomes whose fitness was found in the cache this generation
+
+    def network(self, genome, config):
+        '''Returns the network of genome, compiling it only if it isn't cached'''
+        key = fingerprint(genome)
+        network = self.networks.get(key)
+        if network is not None:
+            self.networks.move_to_end(key)
+            self.hits += 1
+            return network
+        self.misses += 1
+        network = neat.nn.FeedForwardNetwork.create(genome, config)
+        self._store(self.networks, key, network)
+        return network
+
+    def reuse_fitness(self, fitness_function, courses):
+        '''Wraps fitness_function so only the genomes that haven't played
+        these courses before are played, and the others get the fitness they
+        got last time. Only use this when a genome's fitness depends on
+        nothing but the genome and the courses'''
+        seeds = tuple(course.seed for course in courses)
+
+        def evaluate(genomes, config):
+            keys = [(fingerprint(genome), seeds) for _, genome in genomes]
+            unplayed = []
+            for key, (genome_id, genome) in zip(keys, genomes):
+                if key in self.fitness:
+                    self.fitness.move_to_end(key)
+                    genome.fitness = self.fitness[key]
+                    self.reused += 1
+                else:
+                    unplayed.append((genome_id, genome))
+            if unplayed:
+                fitness_function(unplayed, config)
+            for key, (_, genome) in zip(keys, genomes):
+                self._store(self.fitness, key, genome.fitness)
+
+        return evaluate
+
+    def end_generation(self, config, population, species_set):
+        # networks compiled in worker processes aren't counted here
+        compiled = self.hits + self.misses
+        reports = []
+        if compiled:
+            reports.append("{0:d}/{1:d} networks reused ({2:.0%}), {3:d} cached".format(
+                self.hits, compiled, self.hits/compiled, len(self.networks)))
+        if self.fitness:
+            reports.append("fitness reused for {0:d}/{1:d} genomes".format(self.reused, len(population)))
+        if reports:
+            print("Network cache: " + ", ".join(reports))
+        self.hits = self.misses = self.reused = 0
+
+    def _store(self, cache, key, value):
+        '''Adds value to cache, dropping the least recently used entry if it is full'''
+        if not self.maxsize:
+            return
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
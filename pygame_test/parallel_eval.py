@@ -0,0 +1,52 @@
+import math
+from multiprocessing import Pool
+
+from course import make_courses
+from training import TrainingSettings
+
+
+class PoolEvaluator():
+    '''Evaluates each generation's genomes across a pool of worker processes.
+    Works like neat.ParallelEvaluator, except the genomes are sent out in chunks
+    so every worker simulates many birds in one headless world, and all the
+    chunks of a generation play the same Courses. The pipes a bird sees only
+    depend on the course, so a genome's fitness is the same however the
+    population is split between workers'''
+
+    def __init__(self, num_workers, eval_function, chunk_size=None, courses=None, timeout=None):
+        '''eval_function should take a list of (genome id, genome) tuples, the
+        config and a list of Courses, and return a list with the fitness of each
+        genome. Without a chunk_size the genomes are split evenly between the
+        workers. Without courses every generation plays config.training.courses
+        new random ones'''
+        self.num_workers = num_workers
+        self.eval_function = eval_function
+        self.chunk_size = chunk_size
+        self.courses = courses
+        self.timeout = timeout
+        self.pool = Pool(num_workers)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        '''Waits for the workers to finish and stops them'''
+        self.pool.close()
+        self.pool.join()
+
+    def evaluate(self, genomes, config):
+        '''Fitness function to pass to Population.run'''
+        courses = self.courses
+        if courses is None:
+            training = getattr(config, 'training', None) or TrainingSettings()
+            courses = make_courses(training.courses)
+        chunk_size = self.chunk_size or max(1, math.ceil(len(genomes)/self.num_workers))
+        jobs = []
+        for i in range(0, len(genomes), chunk_size):
+            chunk = genomes[i:i+chunk_size]
+            jobs.append((chunk, self.pool.apply_async(self.eval_function, (chunk, config, courses))))
+
+        # assign the fitness back to each genome
+        for chunk, job in jobs:
+            for (_, genome), fitness in zip(chunk, job.get(timeout=self.timeout)):
+                genome.fitness = fitness
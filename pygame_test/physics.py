@@ -0,0 +1,46 @@
+'''Lookup tables for how a bird moves. A bird's displacement only depends on
+its velocity, which is 0 until its first jump and JUMP_VEL after every jump,
+and on the ticks since it last jumped (or since it was made). So every
+displacement Bird.move can work out is in one of two short tables, and
+after a few ticks both settle at the terminal velocity for good.'''
+import numpy as np
+
+JUMP_VEL = -10.5 # velocity right after a jump (negative is up)
+TERMINAL_VEL = 16 # the most a bird can fall in one tick
+MAX_ROTATION = 25 # how much a bird can rotate
+ROT_VEL = 20 # how fast a bird rotates
+
+
+def displacement(vel, tick_count):
+    '''Returns how far a bird with velocity vel moves on tick tick_count after
+    its last jump. This is the formula Bird.move used, and builds the tables'''
+    displacement = vel*tick_count + 1.5*tick_count**2
+    # terminal velocity in the downward direction
+    if displacement > TERMINAL_VEL:
+        displacement = TERMINAL_VEL
+    # if moving upwards, move up a bit more
+    elif displacement < 0:
+        displacement -= 2
+    return float(displacement)
+
+
+def _arc(vel):
+    '''Returns the displacements of every tick until the bird reaches terminal
+    velocity. Index 0 is never used since a bird always moves at least a tick'''
+    arc = [0.0]
+    while arc[-1] != TERMINAL_VEL:
+        arc.append(displacement(vel, len(arc)))
+    return arc
+
+
+# displacement of every tick after a jump (or after being made, for 0),
+# stopping at the first tick at terminal velocity since every later one is too
+ARCS = {0: _arc(0), JUMP_VEL: _arc(JUMP_VEL)}
+LAST_TICK = max(len(arc) for arc in ARCS.values()) - 1 # ticks from here on all move TERMINAL_VEL
+for arc in ARCS.values():
+    arc.extend([float(TERMINAL_VEL)] * (LAST_TICK + 1 - len(arc)))
+# the same tables end to end in one array for Flock, which looks up a bird's
+# displacement at its arc's offset (0, or JUMP_OFFSET once it has jumped) plus its tick
+DISPLACEMENTS = np.array(ARCS[0] + ARCS[JUMP_VEL])
+JUMP_OFFSET = LAST_TICK + 1
+
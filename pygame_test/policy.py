@@ -0,0 +1,99 @@
+'''Saves a trained genome as a small policy file and plays it back quickly.
+The file is a NumPy .npz of the network's node evaluations as arrays, so
+loading it needs neither neat nor the genome classes:
+
+    policy = Policy.load("winner.npz")
+    jump = policy.decide(y, abs(y - top), abs(y - bottom))
+    jumps = policy.decide_batch(observations)
+'''
+import math
+
+import numpy as np
+
+from batch_network import BatchedNetworks
+
+
+def export(genome, config, filename):
+    '''Saves the network of genome to filename as a policy file'''
+    import neat # only needed to compile the genome, not to load the policy
+
+    batched = BatchedNetworks([neat.nn.FeedForwardNetwork.create(genome, config)])
+    np.savez(filename, num_inputs=batched.num_inputs, sources=batched.sources[0], weights=batched.weights[0],
+             bias=batched.bias[0], response=batched.response[0], outputs=batched.outputs[0],
+             fitness=np.nan if genome.fitness is None else genome.fitness)
+
+
+class Policy():
+    '''A feed-forward network loaded from a policy file. Each step evaluates
+    one node as tanh(2.5*(bias + response*sum(value*weight))) over value
+    columns: the inputs, a column of zeros, then one column per step, which
+    is the layout of BatchedNetworks. decide answers a single query in plain
+    Python, which is quicker than NumPy for networks this small, and
+    decide_batch answers many queries with array operations. Both give the
+    same decisions as the neat network the policy was exported from'''
+    TOLERANCE = BatchedNetworks.TOLERANCE
+
+    def __init__(self, num_inputs, sources, weights, bias, response, outputs, fitness=None):
+        self.num_inputs = int(num_inputs)
+        self.sources = np.asarray(sources, dtype=int)
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = np.asarray(bias, dtype=float)
+        self.response = np.asarray(response, dtype=float)
+        self.outputs = np.asarray(outputs, dtype=int)
+        self.fitness = fitness # fitness of the genome when it was exported
+        self.zero = self.num_inputs # the column of zeros
+        # the same steps as lists of Python floats for decide, leaving out the padding
+        self.steps = []
+        for sources, weights, bias, response in zip(self.sources.tolist(), self.weights.tolist(), self.bias.tolist(), self.response.tolist()):
+            links = [(source, weight) for source, weight in zip(sources, weights) if source != self.zero]
+            self.steps.append((links, bias, response))
+        self.output = int(self.outputs[0])
+
+    @classmethod
+    def load(cls, filename):
+        '''Returns the Policy saved in filename by export'''
+        with np.load(filename) as data:
+            fitness = data["fitness"]
+            return cls(data["num_inputs"], data["sources"], data["weights"], data["bias"], data["response"], data["outputs"],
+                       None if np.isnan(fitness) else float(fitness))
+
+    def activate(self, *inputs):
+        '''Returns the first output of the network for one set of inputs'''
+        values = list(inputs)
+        values.append(0.0)
+        for links, bias, response in self.steps:
+            total = 0.0
+            for source, weight in links:
+                total += values[source] * weight
+            # same as neat's tanh_activation
+            values.append(math.tanh(max(-60.0, min(60.0, 2.5 * (bias + response * total)))))
+        return values[self.output]
+
+    def decide(self, *inputs, threshold=0.5):
+        '''Returns whether the bird should jump given one set of inputs'''
+        return self.activate(*inputs) > threshold
+
+    def activate_batch(self, inputs):
+        '''Returns the outputs of the network for an (N, num_inputs) array of inputs'''
+        inputs = np.asarray(inputs, dtype=float)
+        values = np.zeros((len(inputs), self.zero + 1 + len(self.steps)))
+        values[:, :self.num_inputs] = inputs
+        for step in range(len(self.steps)):
+            total = np.zeros(len(inputs))
+            # add the links up one at a time, in the same order as activate
+            for source, weight in zip(self.sources[step], self.weights[step]):
+                total = total + values[:, source] * weight
+            z = self.bias[step] + self.response[step] * total
+            values[:, self.zero + 1 + step] = np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+        return values[:, self.outputs]
+
+    def decide_batch(self, inputs, threshold=0.5):
+        '''Returns a bool array of whether the bird should jump for each row of
+        inputs. Outputs right at the threshold, where np.tanh and math.tanh
+        could disagree, are worked out again with activate'''
+        inputs = np.asarray(inputs, dtype=float)
+        output = self.activate_batch(inputs)[:, 0]
+        decisions = output > threshold
+        for i in np.flatnonzero(np.abs(output - threshold) < self.TOLERANCE):
+            decisions[i] = self.decide(*inputs[i], threshold=threshold)
+        return decisions
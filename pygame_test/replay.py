@@ -0,0 +1,161 @@
+'''Records what every bird did in a generation and replays it. A trace holds
+each bird's jump decisions as one bit per frame, along with the seeds of the
+courses played, so any bird can be re-simulated on its own in a FlappyEnv
+without its genome or network, and each course can be played again with all
+its birds together. When every genome plays several courses, each genome
+has a bird on each of them.
+
+    python3 replay.py traces/trace-12.npz --verify
+    python3 replay.py traces/trace-12.npz --bird 3 --render
+'''
+import argparse
+import os
+
+import numpy as np
+import pygame
+from neat.reporting import BaseReporter
+
+from course import Course
+from env import FlappyEnv
+import game
+
+
+class TraceRecorder(BaseReporter):
+    '''Records every bird's jumps in each generation main plays and saves them
+    to directory/trace-<generation>.npz when the game ends'''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.generation = 0
+        self.rows = [] # one packed row of jump bits per frame
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def start(self):
+        '''Called by main before the first frame'''
+        self.rows = []
+
+    def record(self, jumping):
+        '''Called by main every frame with the bool array of birds that jump'''
+        self.rows.append(np.packbits(jumping))
+
+    def save(self, courses, genomes, fitness, frames):
+        '''Called by main when the game ends. genomes is the list of genomes in
+        the order of their birds on each course, and fitness is every bird's
+        fitness on its own course'''
+        os.makedirs(self.directory, exist_ok=True)
+        filename = os.path.join(self.directory, "trace-{0}.npz".format(self.generation))
+        np.savez_compressed(filename, seeds=[course.seed for course in courses], frames=frames, keys=[g.key for g in genomes],
+                            fitness=fitness, jumps=np.array(self.rows, dtype=np.uint8).reshape(frames, -1))
+        return filename
+
+
+class Trace():
+    '''A generation recorded by TraceRecorder'''
+
+    def __init__(self, filename):
+        with np.load(filename) as data:
+            self.seeds = data["seeds"] # seeds of the courses that were played
+            self.frames = int(data["frames"]) # how many frames the game ran for
+            self.keys = data["keys"] # genome key of every genome, in the order of their birds on each course
+            self.fitness = data["fitness"] # fitness every bird finished with on its course
+            # frames x birds jump bits, unpacked once rather than for every bird
+            self.jumping = np.unpackbits(data["jumps"], axis=1, count=len(self.fitness)).astype(bool)
+
+    def __len__(self):
+        return len(self.fitness)
+
+    def key(self, index):
+        '''Returns the genome key of the bird at index'''
+        return int(self.keys[index % len(self.keys)])
+
+    def seed(self, index):
+        '''Returns the seed of the course the bird at index played'''
+        return int(self.seeds[index // len(self.keys)])
+
+    def jumps(self, index):
+        '''Returns a bool array of whether the bird at index jumped in each frame'''
+        return self.jumping[:, index]
+
+    def birds(self, course):
+        '''Returns the slice of the birds that played the course at index course'''
+        return slice(course*len(self.keys), (course+1)*len(self.keys))
+
+
+def replay(trace, index, window=None):
+    '''Re-simulates the bird at index of the trace on its own from its
+    recorded jumps and returns its fitness and the frames it survived. If a
+    window is given the replay is drawn at 30 fps'''
+    jumps = trace.jumps(index)
+    env = FlappyEnv(1)
+    env.reset(courses=[Course(trace.seed(index))])
+    clock = pygame.time.Clock()
+    fitness = np.zeros(1)
+    frame = 0
+    done = False
+
+    while not done and frame < trace.frames:
+        if window is not None:
+            clock.tick(30)
+            pygame.event.pump()
+        _, rewards, dones = env.step(jumps[frame:frame+1])
+        fitness += rewards
+        done = dones[0]
+        if window is not None:
+            env.draw(window)
+        frame += 1
+    return fitness[0], frame
+
+
+def replay_course(trace, course):
+    '''Re-simulates all the birds of the course at index course together
+    from their recorded jumps, the way the generation played them, and
+    returns every one's fitness'''
+    jumps = trace.jumping[:, trace.birds(course)]
+    env = FlappyEnv(jumps.shape[1])
+    played = Course(int(trace.seeds[course]))
+    env.reset(courses=[played]*env.num_worlds)
+    fitness = np.zeros(env.num_worlds)
+    frame = 0
+    done = False
+
+    while not done and frame < trace.frames:
+        _, rewards, dones = env.step(jumps[frame])
+        fitness += rewards
+        done = dones.all()
+        frame += 1
+    return fitness
+
+
+def verify(trace):
+    '''Replays every course in the trace and returns the replayed fitness of
+    every bird, and the indexes of the birds whose replayed fitness differs
+    from the recorded one'''
+    fitness = np.concatenate([replay_course(trace, course) for course in range(len(trace.seeds))])
+    return fitness, np.flatnonzero(fitness != trace.fitness)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay birds recorded with --record")
+    parser.add_argument("trace", help="trace file written by a training run")
+    parser.add_argument("--bird", type=int, default=None, help="replay the bird at this index (default: the fittest)")
+    parser.add_argument("--render", action="store_true", help="draw the replay in a window")
+    parser.add_argument("--verify", action="store_true", help="replay every bird and check its fitness matches the recording")
+    args = parser.parse_args()
+
+    trace = Trace(args.trace)
+    if args.verify:
+        fitness, mismatches = verify(trace)
+        print("{0:d} of {1:d} birds replayed with the recorded fitness".format(len(trace)-len(mismatches), len(trace)))
+        for i in mismatches:
+            print("  bird {0:d} (genome {1:d}, course {2:d}): recorded {3:.1f}, replayed {4:.1f}".format(
+                i, trace.key(i), trace.seed(i), trace.fitness[i], fitness[i]))
+    else:
+        index = args.bird if args.bird is not None else int(np.argmax(trace.fitness))
+        window = None
+        if args.render:
+            window = pygame.display.set_mode((game.WIN_WIDTH, game.WIN_HEIGHT))
+        fitness, frames = replay(trace, index, window)
+        print("bird {0:d} (genome {1:d}, course {2:d}) survived {3:d} frames with fitness {4:.1f} (recorded {5:.1f})".format(
+            index, trace.key(index), trace.seed(index), frames, fitness, trace.fitness[index]))
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import time
+
+import numpy as np
+from neat.reporting import BaseReporter
+
+
+class PhaseProfiler(BaseReporter):
+    '''Times the phases of every frame of the game loop in main and reports
+    where each generation's time went, with per-frame percentiles. main calls
+    start_frame at the top of each frame and lap at the end of each phase;
+    when no profiler is given those calls are skipped entirely'''
+    PHASES = ["events", "networks", "movement", "pipe collision", "pipes", "base collision", "draw"]
+
+    def __init__(self, filename=None):
+        self.filename = filename # if given, every generation's breakdown is appended to it as a line of JSON
+        self.generation = None
+        self.frames = [] # the time spent in each phase for every frame of the current generation
+        self.current = {}
+        self.last = 0
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.frames = []
+
+    def start_frame(self):
+        '''Called at the start of each frame, before the first phase'''
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        '''Adds the time since the last lap (or the start of the frame) to phase'''
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        '''Called at the end of each frame, after the last phase'''
+        self.frames.append([self.current[phase] for phase in self.PHASES])
+
+    def breakdown(self):
+        '''Returns the total, share and per-frame percentiles of every phase of this generation'''
+        times = np.array(self.frames).reshape(-1, len(self.PHASES))
+        total = times.sum()
+        phases = {}
+        for i, phase in enumerate(self.PHASES):
+            p50, p90, p99 = np.percentile(times[:, i], [50, 90, 99]) if len(times) else (0.0, 0.0, 0.0)
+            phases[phase] = {"total": times[:, i].sum(), "share": times[:, i].sum()/total if total else 0.0,
+                             "p50": p50, "p90": p90, "p99": p99}
+        return {"generation": self.generation, "frames": len(times), "total": total, "phases": phases}
+
+    def end_generation(self, config, population, species_set):
+        result = self.breakdown()
+        print("Phase breakdown over {0:d} frames ({1:.3f} sec):".format(result["frames"], result["total"]))
+        print("  phase            total   share      p50      p90      p99 (usec per frame)")
+        for phase, times in result["phases"].items():
+            print("  {: <14} {: >7.3f}  {: >5.1%}  {: >7.1f}  {: >7.1f}  {: >7.1f}".format(
+                phase, times["total"], times["share"], times["p50"]*1e6, times["p90"]*1e6, times["p99"]*1e6))
+        if self.filename:
+            with open(self.filename, "a") as f:
+                f.write(json.dumps(result) + "\n")
+
+
+class StatsLog(BaseReporter):
+    '''Writes a row of statistics about every generation to a CSV file as
+    soon as it has been evaluated, instead of keeping them all in memory the
+    way neat.StatisticsReporter does. Only the current generation is held,
+    so memory stays the same however long training runs, and the file is
+    flushed every flush_every generations so it can be read (or plotted)
+    while training is still going. main calls add_game with the frames and
+    pipes of every game it plays; games played by workers in other
+    processes leave those columns empty. The file is started afresh unless
+    resume_from is given, when the rows of the generations before it are
+    kept and the rest, which are about to be played again, are dropped'''
+    COLUMNS = ["generation", "genomes", "best_fitness", "mean_fitness", "stdev_fitness", "species", "species_sizes",
+               "pipes", "frames", "eval_seconds"]
+
+    def __init__(self, filename, flush_every=1, resume_from=None):
+        self.flush_every = flush_every
+        kept = self._kept_rows(filename, resume_from) if resume_from is not None else []
+        self.file = open(filename, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.COLUMNS)
+        self.writer.writerows(kept)
+        self.file.flush()
+        self.generation = None
+        self.start = 0
+        self.pipes = None # most pipes passed in a game this generation
+        self.frames = None # frames simulated this generation
+        self.rows = 0 # rows written since the last flush
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.start = time.perf_counter()
+        self.pipes = None
+        self.frames = None
+
+    def add_game(self, frames, pipes):
+        '''Called by main at the end of every game it plays'''
+        self.frames = (self.frames or 0) + frames
+        self.pipes = max(self.pipes or 0, pipes)
+
+    def post_evaluate(self, config, population, species, best_genome):
+        eval_seconds = time.perf_counter() - self.start
+        fitness = np.array([genome.fitness for genome in population.values()], dtype=float)
+        sizes = sorted((len(s.members) for s in species.species.values()), reverse=True)
+        self.writer.writerow([self.generation, len(fitness), fitness.max(), fitness.mean(), fitness.std(), len(sizes),
+                              " ".join(str(size) for size in sizes), "" if self.pipes is None else self.pipes,
+                              "" if self.frames is None else self.frames, "{0:.3f}".format(eval_seconds)])
+        self.rows += 1
+        if self.rows >= self.flush_every:
+            self.flush()
+
+    @staticmethod
+    def _kept_rows(filename, generation):
+        '''Returns the rows of the log in filename from before generation'''
+        if not os.path.exists(filename):
+            return []
+        with open(filename, newline="") as f:
+            rows = list(csv.reader(f))[1:]
+        return [row for row in rows if row and int(row[0]) < generation]
+
+    def flush(self):
+        '''Writes the buffered rows to the file'''
+        self.file.flush()
+        self.rows = 0
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,225 @@
+import numpy as np
+from neat.config import ConfigParameter, DefaultClassConfig
+from neat.math_util import mean, stdev
+from neat.species import DefaultSpeciesSet, Species
+
+
+class GeneColumns():
+    '''Every gene of a population, gathered by gene key, so the distance from
+    one genome to all of them can be worked out with array operations. Each
+    key holds the rows of the genomes that have that gene and the gene's
+    values in each of them'''
+
+    def __init__(self, population):
+        self.index = dict((genome_id, row) for row, genome_id in enumerate(population)) # genome id -> row
+        self.num_nodes = np.array([len(genome.nodes) for genome in population.values()])
+        self.num_connections = np.array([len(genome.connections) for genome in population.values()])
+        nodes = {} # node key -> (row, bias, response, activation, aggregation) of every genome with that node
+        connections = {} # connection key -> (row, weight, enabled) of every genome with that connection
+        for row, genome in enumerate(population.values()):
+            for key, gene in genome.nodes.items():
+                nodes.setdefault(key, []).append((row, gene.bias, gene.response, gene.activation, gene.aggregation))
+            for key, gene in genome.connections.items():
+                connections.setdefault(key, []).append((row, gene.weight, gene.enabled))
+        self.nodes = {}
+        for key, genes in nodes.items():
+            rows, bias, response, activation, aggregation = zip(*genes)
+            self.nodes[key] = (np.array(rows), np.array(bias), np.array(response), np.array(activation, dtype=object),
+                               np.array(aggregation, dtype=object))
+        self.connections = {}
+        for key, genes in connections.items():
+            rows, weight, enabled = zip(*genes)
+            self.connections[key] = (np.array(rows), np.array(weight), np.array(enabled))
+
+    def distances(self, genome, config):
+        '''Returns the distance from genome to every genome in the population,
+        in the same order as the population. Each distance is added up gene
+        by gene in the same order as genome.distance does, so they are
+        exactly the distances it gives'''
+        weight_coefficient = config.compatibility_weight_coefficient
+        disjoint_coefficient = config.compatibility_disjoint_coefficient
+
+        node_distance = np.zeros(len(self.index))
+        homologous = np.zeros(len(self.index), dtype=int)
+        for key, gene in genome.nodes.items():
+            column = self.nodes.get(key)
+            if column is None:
+                continue
+            rows, bias, response, activation, aggregation = column
+            d = np.abs(gene.bias - bias) + np.abs(gene.response - response)
+            d = d + (activation != gene.activation)
+            d = d + (aggregation != gene.aggregation)
+            node_distance[rows] = node_distance[rows] + d * weight_coefficient
+            homologous[rows] += 1
+        node_distance = self._normalize(node_distance, homologous, len(genome.nodes), self.num_nodes, disjoint_coefficient)
+
+        connection_distance = np.zeros(len(self.index))
+        homologous = np.zeros(len(self.index), dtype=int)
+        for key, gene in genome.connections.items():
+            column = self.connections.get(key)
+            if column is None:
+                continue
+            rows, weight, enabled = column
+            d = np.abs(gene.weight - weight)
+            d = d + (enabled != gene.enabled)
+            connection_distance[rows] = connection_distance[rows] + d * weight_coefficient
+            homologous[rows] += 1
+        connection_distance = self._normalize(connection_distance, homologous, len(genome.connections), self.num_connections,
+                                              disjoint_coefficient)
+        return node_distance + connection_distance
+
+    @staticmethod
+    def _normalize(distance, homologous, count, counts, disjoint_coefficient):
+        '''Adds the disjoint genes to the distances of one kind of gene and
+        divides by the number of genes, where genome has count genes of
+        that kind and the population counts'''
+        disjoint = (count - homologous) + (counts - homologous)
+        most = np.maximum(count, counts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(most > 0, (distance + disjoint_coefficient * disjoint) / most, 0.0)
+
+
+class CachedDistances():
+    '''Looks up the distance between two genomes for one speciation, like
+    neat's GenomeDistanceCache, except that cache carries over to the next
+    speciation (distances are kept by genome key, since a genome never
+    changes once it has one). When columns are given the distances from a
+    genome to the whole population are worked out at once the first time
+    one of them is needed'''
+
+    def __init__(self, config, cache, maxsize, columns=None):
+        self.config = config
+        self.cache = cache # (genome key, genome key) -> distance, oldest first
+        self.maxsize = maxsize
+        self.columns = columns
+        self.rows = {} # genome key -> its distances to the whole population, from columns
+        self.values = [] # every distance looked up in this speciation, for the report
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, genome0, genome1):
+        key = (genome0.key, genome1.key)
+        d = self.cache.get(key)
+        if d is None:
+            self.misses += 1
+            d = self._distance(genome0, genome1)
+            self.cache[key] = d
+            self.cache[genome1.key, genome0.key] = d
+        else:
+            self.hits += 1
+        self.values.append(d)
+        return d
+
+    def trim(self):
+        '''Called at the end of the speciation: if the cache holds more than
+        maxsize distances, only the newest maxsize/2 are kept. Dropping them
+        in bulk is much cheaper than keeping the cache in least recently
+        used order on every lookup'''
+        if len(self.cache) > self.maxsize:
+            newest = list(self.cache.items())[len(self.cache) - self.maxsize // 2:]
+            self.cache.clear()
+            self.cache.update(newest)
+
+    def _distance(self, genome0, genome1):
+        row = self.columns.index.get(genome1.key) if self.columns is not None else None
+        if row is None:
+            return genome0.distance(genome1, self.config)
+        distances = self.rows.get(genome0.key)
+        if distances is None:
+            distances = self.rows[genome0.key] = self.columns.distances(genome0, self.config)
+        return float(distances[row])
+
+
+class CachedSpeciesSet(DefaultSpeciesSet):
+    '''Speciates exactly like neat.DefaultSpeciesSet, but keeps genome
+    distances between generations, so the distances between genomes that
+    carry over (elites and species representatives) aren't worked out
+    again. The cache holds up to distance_cache_size distances between
+    speciations, dropping the oldest first. With vectorized_distance the distances from
+    a representative to the whole population are worked out together over
+    arrays of the population's genes, which is much quicker for large
+    populations. Both are set in the [CachedSpeciesSet] section of the config'''
+
+    def __init__(self, config, reporters):
+        super().__init__(config, reporters)
+        self.cache = {} # (genome key, genome key) -> distance, kept between generations
+
+    @classmethod
+    def parse_config(cls, param_dict):
+        return DefaultClassConfig(param_dict, [ConfigParameter('compatibility_threshold', float),
+                                               ConfigParameter('distance_cache_size', int, 200000),
+                                               ConfigParameter('vectorized_distance', bool, True)])
+
+    def speciate(self, config, population, generation):
+        '''Places genomes into species by genetic similarity, the same way
+        DefaultSpeciesSet.speciate does'''
+        assert isinstance(population, dict)
+
+        compatibility_threshold = self.species_set_config.compatibility_threshold
+        columns = GeneColumns(population) if self.species_set_config.vectorized_distance else None
+        distances = CachedDistances(config.genome_config, self.cache, self.species_set_config.distance_cache_size, columns)
+
+        # Find the best representatives for each existing species.
+        unspeciated = set(population.keys()) # built the way neat builds it, so genomes are taken in the same order
+        new_representatives = {}
+        new_members = {}
+        for sid, s in self.species.items():
+            candidates = []
+            for gid in unspeciated:
+                g = population[gid]
+                d = distances(s.representative, g)
+                candidates.append((d, g))
+
+            # The new representative is the genome closest to the current representative.
+            ignored_rdist, new_rep = min(candidates, key=lambda x: x[0])
+            new_rid = new_rep.key
+            new_representatives[sid] = new_rid
+            new_members[sid] = [new_rid]
+            unspeciated.remove(new_rid)
+
+        # Partition population into species based on genetic similarity.
+        while unspeciated:
+            gid = unspeciated.pop()
+            g = population[gid]
+
+            # Find the species with the most similar representative.
+            candidates = []
+            for sid, rid in new_representatives.items():
+                rep = population[rid]
+                d = distances(rep, g)
+                if d < compatibility_threshold:
+                    candidates.append((d, sid))
+
+            if candidates:
+                ignored_sdist, sid = min(candidates, key=lambda x: x[0])
+                new_members[sid].append(gid)
+            else:
+                # No species is similar enough, create a new species, using
+                # this genome as its representative.
+                sid = next(self.indexer)
+                new_representatives[sid] = gid
+                new_members[sid] = [gid]
+
+        # Update species collection based on new speciation.
+        self.genome_to_species = {}
+        for sid, rid in new_representatives.items():
+            s = self.species.get(sid)
+            if s is None:
+                s = Species(sid, generation)
+                self.species[sid] = s
+
+            members = new_members[sid]
+            for gid in members:
+                self.genome_to_species[gid] = sid
+
+            member_dict = dict((gid, population[gid]) for gid in members)
+            s.update(population[rid], member_dict)
+
+        distances.trim()
+
+        gdmean = mean(distances.values)
+        gdstdev = stdev(distances.values)
+        looked_up = distances.hits + distances.misses
+        self.reporters.info(
+            'Mean genetic distance {0:.3f}, standard deviation {1:.3f}, {2:d}/{3:d} distances cached ({4:.0%})'.format(
+                gdmean, gdstdev, distances.hits, looked_up, distances.hits/looked_up if looked_up else 0))
@@ -0,0 +1,237 @@
+'''Tunes config-neat.txt by training many variants of it headless at once.
+Every parameter is given as name=values, where values is a comma separated
+list, or lo:hi for a range to draw from with --samples:
+
+    python3 sweep.py --param pop_size=20,50,100 --param compatibility_threshold=2.5,3.0,3.5
+    python3 sweep.py --samples 16 --param node_add_prob=0.05:0.5 --param weight_mutate_rate=0.5:0.95
+
+Without --samples every combination of the lists is tried. The variants are
+trained with successive halving: they all train for a few generations, the
+best 1/eta of them carry on for eta times as many generations in total, and
+so on until one is left or max_generations is reached, so most of the time
+goes to the most promising ones. Every variant plays the same courses and
+trains for all its generations even once it reaches fitness_threshold, so
+variants are ranked by how few generations they took to reach it, and the
+others by their best fitness. The results are printed and saved to
+summary.csv in the sweep directory.
+'''
+import argparse
+import csv
+import functools
+import itertools
+import os
+import random
+import time
+from configparser import ConfigParser
+from multiprocessing import Pool
+
+import neat
+from neat.reporting import BaseReporter
+
+import AI_flappy_bird
+from checkpoint import BackgroundCheckpointer, restore_latest
+from course import make_courses
+from network_cache import NetworkCache
+from reporters import StatsLog
+from speciation import CachedSpeciesSet
+from training import TrainingSettings
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config-neat.txt')
+
+
+def parse_param(param):
+    '''Turns "name=1,2,3" into (name, [1, 2, 3]) and "name=lo:hi" into
+    (name, (lo, hi)), converting the values to numbers where they are ones'''
+    name, _, values = param.partition("=")
+    if not name or not values:
+        raise ValueError("Expected name=values, got {0!r}".format(param))
+    if ":" in values:
+        lo, hi = values.split(":")
+        return name.strip(), (number(lo), number(hi))
+    return name.strip(), [number(value) for value in values.split(",")]
+
+
+def number(value):
+    '''Returns value as an int or float if it is one, otherwise as it is'''
+    value = value.strip()
+    for kind in (int, float):
+        try:
+            return kind(value)
+        except ValueError:
+            pass
+    return value
+
+
+def variants(params, samples=None, seed=None):
+    '''Returns the settings of every variant to try: every combination of the
+    lists in params, or samples random draws from the lists and ranges'''
+    if samples is None:
+        ranges = [name for name, values in params.items() if isinstance(values, tuple)]
+        if ranges:
+            raise ValueError("Ranges need --samples: {0}".format(", ".join(ranges)))
+        return [dict(zip(params, values)) for values in itertools.product(*params.values())]
+    rng = random.Random(seed)
+    def draw(values):
+        if isinstance(values, list):
+            return rng.choice(values)
+        lo, hi = values
+        return rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+    return [dict((name, draw(values)) for name, values in params.items()) for _ in range(samples)]
+
+
+def write_config(settings, directory, base_file=CONFIG_FILE, max_frames=None):
+    '''Writes a copy of base_file with settings changed to directory and
+    returns its path. Each setting is changed in whichever section has it.
+    max_frames, if given, caps every game so a good variant can't play forever.
+    Reaching fitness_threshold doesn't end the training or the game, so
+    every variant trains for as many generations as it is given'''
+    parser = ConfigParser()
+    parser.read(base_file)
+    for name, value in settings.items():
+        sections = [section for section in parser.sections() if parser.has_option(section, name)]
+        if not sections:
+            raise ValueError("{0} is not in {1}".format(name, base_file))
+        parser.set(sections[0], name, str(value))
+    if not parser.has_section("Training"):
+        parser.add_section("Training")
+    if max_frames is not None:
+        parser.set("Training", "max_frames", str(max_frames))
+    parser.set("Training", "stop_at_threshold", "False")
+    parser.set("NEAT", "no_fitness_termination", "True")
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, "config.txt")
+    with open(filename, "w") as f:
+        parser.write(f)
+    return filename
+
+
+class Solved(BaseReporter):
+    '''Notes the first generation whose fitness criterion reaches fitness_threshold'''
+
+    def __init__(self):
+        self.generation = None # the generation being played
+        self.solved_at = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        criterion = {'max': max, 'min': min, 'mean': lambda fitness: sum(fitness)/len(fitness)}[config.fitness_criterion]
+        if self.solved_at is None and criterion([genome.fitness for genome in population.values()]) >= config.fitness_threshold:
+            self.solved_at = self.generation
+
+
+def train(directory, generations, seed):
+    '''Trains the variant in directory for up to generations generations in
+    total, carrying on from where it got to last time, and returns the
+    generations trained so far, the best fitness found, the first
+    generation that reached fitness_threshold this time (or None) and the
+    seconds it took. Runs in the pool'''
+    start = time.perf_counter()
+    config_file = os.path.join(directory, "config.txt")
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, CachedSpeciesSet, neat.DefaultStagnation, config_file)
+    config.training = TrainingSettings(config_file)
+    pop = restore_latest(directory, config)
+    if pop is None:
+        random.seed(seed)
+        pop = neat.population.Population(config)
+
+    stats = StatsLog(os.path.join(directory, "stats.csv"), resume_from=pop.generation) # every rung adds to the variant's log
+    pop.add_reporter(stats)
+    solved = Solved()
+    pop.add_reporter(solved)
+    cache = NetworkCache()
+    courses = make_courses(config.training.courses, seed)
+    fitness_function = functools.partial(AI_flappy_bird.main, headless=True, courses=courses, cache=cache, stats=stats)
+    if config.training.repeatable(config):
+        fitness_function = cache.reuse_fitness(fitness_function, courses)
+    try:
+        pop.run(fitness_function, generations - pop.generation)
+    finally:
+        stats.close()
+    # save where it got to, for the next rung
+    checkpointer = BackgroundCheckpointer(directory=directory, keep=1, resume=True)
+    checkpointer.best_genome = pop.best_genome
+    checkpointer.save(pop.population, pop.species, pop.generation)
+    checkpointer.close()
+    best_fitness = pop.best_genome.fitness if pop.best_genome is not None else float("-inf")
+    return pop.generation, best_fitness, solved.solved_at, time.perf_counter() - start
+
+
+def sweep(params, directory="sweep", samples=None, generations=5, max_generations=30, eta=2, workers=None,
+          seed=0, max_frames=3000, base_file=CONFIG_FILE):
+    '''Trains a variant of base_file for every setting of params with
+    successive halving across a pool of workers processes (one per CPU by
+    default) and returns the results, best first'''
+    if os.path.exists(os.path.join(directory, "trial-0")):
+        raise FileExistsError("{0} already holds a sweep, pick another directory".format(directory))
+    trials = []
+    for i, settings in enumerate(variants(params, samples, seed)):
+        trial_directory = os.path.join(directory, "trial-{0:d}".format(i))
+        write_config(settings, trial_directory, base_file, max_frames)
+        trials.append({"trial": i, "settings": settings, "directory": trial_directory, "generations": 0,
+                       "best_fitness": float("-inf"), "solved_at": None, "seconds": 0.0})
+
+    remaining = trials
+    budget = min(generations, max_generations)
+    with Pool(workers) as pool:
+        while True:
+            print("Training {0:d} variants to generation {1:d}".format(len(remaining), budget))
+            results = pool.starmap(train, [(trial["directory"], budget, seed) for trial in remaining])
+            for trial, (trained, best_fitness, solved_at, seconds) in zip(remaining, results):
+                trial["generations"] = trained
+                trial["best_fitness"] = best_fitness
+                if trial["solved_at"] is None:
+                    trial["solved_at"] = solved_at
+                trial["seconds"] += seconds
+            remaining = sorted(remaining, key=rank)
+            if len(remaining) <= 1 or budget >= max_generations:
+                break
+            # only the best of them carry on, for longer
+            remaining = remaining[:max(1, len(remaining) // eta)]
+            budget = min(budget * eta, max_generations)
+
+    # variants that reached the threshold come first, then the ones that were cut the latest
+    results = sorted(trials, key=lambda trial: (trial["solved_at"] is None, -trial["generations"] if trial["solved_at"] is None else 0, rank(trial)))
+    write_summary(results, params, os.path.join(directory, "summary.csv"))
+    return results
+
+
+def rank(trial):
+    '''Sorts variants that reached fitness_threshold first, the quickest to
+    reach it first, and the others by their best fitness'''
+    if trial["solved_at"] is not None:
+        return (0, trial["solved_at"], -trial["best_fitness"])
+    return (1, 0, -trial["best_fitness"])
+
+
+def write_summary(results, params, filename):
+    '''Prints the results as a table and saves them to filename as CSV'''
+    columns = ["trial"] + list(params) + ["generations", "solved_at", "best_fitness", "seconds"]
+    rows = [[trial["trial"]] + [trial["settings"][name] for name in params] +
+            [trial["generations"], "" if trial["solved_at"] is None else trial["solved_at"],
+             "{0:.1f}".format(trial["best_fitness"]), "{0:.1f}".format(trial["seconds"])] for trial in results]
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    widths = [max(len(str(value)) for value in column) for column in zip(columns, *rows)]
+    for row in [columns] + rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+    print("Saved the summary to {0}".format(filename))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune config-neat.txt with a parallel sweep and successive halving")
+    parser.add_argument("--param", action="append", required=True, help="name=v1,v2,... or name=lo:hi, for any setting in config-neat.txt")
+    parser.add_argument("--samples", type=int, default=None, help="try this many random variants instead of every combination")
+    parser.add_argument("--generations", type=int, default=5, help="generations every variant trains for before the first cut (default: 5)")
+    parser.add_argument("--max-generations", type=int, default=30, help="generations the best variants train for in the end (default: 30)")
+    parser.add_argument("--eta", type=int, default=2, help="keep the best 1/eta of the variants at every cut (default: 2)")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the courses, the first populations and --samples")
+    parser.add_argument("--max-frames", type=int, default=3000, help="frames a game can last, so strong variants don't play forever (default: 3000)")
+    parser.add_argument("--dir", default="sweep", help="directory to save the variants and the summary in (default: sweep)")
+    args = parser.parse_args()
+    params = dict(parse_param(param) for param in args.param)
+    sweep(params, args.dir, args.samples, args.generations, args.max_generations, args.eta, args.workers, args.seed, args.max_frames)
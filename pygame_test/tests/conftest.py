@@ -0,0 +1,48 @@
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # the game modules load images, which needs a display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import neat
+import pytest
+
+from speciation import CachedSpeciesSet
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'config-neat.txt')
+
+
+@pytest.fixture
+def config():
+    '''The config the game trains with'''
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, CachedSpeciesSet, neat.DefaultStagnation, CONFIG_FILE)
+
+
+def mutated_genomes(config, count, mutations=20, seed=0):
+    '''Returns count genomes that have each been mutated mutations times,
+    with a node and a connection added every time as well, so most of them
+    have hidden nodes in several layers'''
+    random.seed(seed)
+    genomes = []
+    for key in range(count):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)
+            genome.mutate_add_node(config.genome_config)
+            genome.mutate_add_connection(config.genome_config)
+        genomes.append(genome)
+    return genomes
+
+
+def pilot(config, key, bias):
+    '''Returns a genome that jumps when the bird is nearer the bottom pipe
+    than the top one, so it gets through some pipes'''
+    genome = config.genome_type(key)
+    genome.nodes[0] = genome.create_node(config.genome_config, 0)
+    genome.nodes[0].bias = bias
+    genome.nodes[0].response = 1.0
+    for source, weight in ((-1, 0.0), (-2, 0.01), (-3, -0.01)):
+        genome.add_connection(config.genome_config, source, 0, weight, True)
+    return genome
@@ -0,0 +1,32 @@
+import numpy as np
+import pygame
+
+import AI_flappy_bird
+import assets
+from conftest import pilot
+from course import make_courses
+from training import TrainingSettings
+
+
+def same(mask, other):
+    return (mask.get_size() == other.get_size() and mask.count() == other.count() ==
+            mask.overlap_area(other, (0, 0)))
+
+
+def test_shipped_masks_match_the_images():
+    for name in assets.SIMULATED:
+        for flipped in (False, True):
+            assert same(assets.mask(name, flipped), pygame.mask.from_surface(assets._load(name, flipped)))
+
+
+def test_headless_game_loads_no_images(config, monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, "IMGS_DIR", str(tmp_path)) # as on a worker without the image files
+    monkeypatch.setattr(assets, "_images", {})
+    monkeypatch.setattr(assets, "_masks", {})
+    monkeypatch.setattr(assets, "_bits", None)
+    AI_flappy_bird.game.pipe_collisions.cache_clear()
+    config.training = TrainingSettings()
+    config.training.max_frames = 300
+    genomes = [(i, pilot(config, i, bias)) for i, bias in enumerate(np.linspace(-0.3, 0.1, 5))]
+    AI_flappy_bird.main(genomes, config, headless=True, courses=make_courses(1, 2))
+    assert assets._images == {}
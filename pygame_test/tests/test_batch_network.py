@@ -0,0 +1,50 @@
+import neat
+import numpy as np
+import pytest
+
+from batch_network import BatchedNetworks
+from conftest import mutated_genomes
+
+
+def test_genomes_have_hidden_layers(config):
+    # otherwise the other tests only cover single layer networks
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in mutated_genomes(config, 50)]
+    assert sum(len(net.node_evals) > 3 for net in networks) > 25
+
+
+def test_activate_matches_network(config):
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in mutated_genomes(config, 50)]
+    batched = BatchedNetworks(networks)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        inputs = rng.uniform(-500, 500, (len(networks), 3))
+        outputs = batched.activate(inputs)
+        for net, row, output in zip(networks, inputs, outputs):
+            assert np.allclose(output, net.activate(tuple(row)), rtol=0, atol=1e-12)
+
+
+def test_decide_matches_network(config):
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in mutated_genomes(config, 50)]
+    batched = BatchedNetworks(networks)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        inputs = rng.uniform(-500, 500, (len(networks), 3))
+        expected = [net.activate(tuple(row))[0] > 0.5 for net, row in zip(networks, inputs)]
+        assert batched.decide(inputs).tolist() == expected
+
+
+def test_decide_some_rows(config):
+    networks = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in mutated_genomes(config, 30)]
+    batched = BatchedNetworks(networks)
+    rows = np.array([3, 7, 8, 20, 29])
+    inputs = np.random.default_rng(2).uniform(-500, 500, (len(rows), 3))
+    expected = [networks[row].activate(tuple(inputs[i]))[0] > 0.5 for i, row in enumerate(rows)]
+    assert batched.decide(inputs, rows).tolist() == expected
+
+
+def test_rejects_other_activations(config):
+    genome = mutated_genomes(config, 1)[0]
+    for node in genome.nodes.values():
+        node.activation = "sigmoid"
+    with pytest.raises(ValueError):
+        BatchedNetworks([neat.nn.FeedForwardNetwork.create(genome, config)])
@@ -0,0 +1,66 @@
+import os
+
+import neat
+import pytest
+
+from checkpoint import BackgroundCheckpointer, checkpoints, latest_run, restore_latest, run_directory
+
+
+def save(checkpointer, pop, *generations):
+    for generation in generations:
+        checkpointer.save(pop.population, pop.species, generation)
+    checkpointer.close()
+
+
+def names(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_keeps_the_newest(config, tmp_path):
+    pop = neat.population.Population(config)
+    save(BackgroundCheckpointer(directory=str(tmp_path), keep=2), pop, 5, 10, 15)
+    assert names(tmp_path) == ["checkpoint-10.gz", "checkpoint-15.gz"]
+
+
+def test_refuses_another_runs_directory(config, tmp_path):
+    save(BackgroundCheckpointer(directory=str(tmp_path)), neat.population.Population(config), 5)
+    with pytest.raises(FileExistsError):
+        BackgroundCheckpointer(directory=str(tmp_path))
+
+
+def test_only_rotates_its_own_files(config, tmp_path):
+    (tmp_path / "notes.txt").write_text("not a checkpoint")
+    (tmp_path / "checkpoint-3.gz.tmp").write_bytes(b"")
+    pop = neat.population.Population(config)
+    save(BackgroundCheckpointer(directory=str(tmp_path), keep=1), pop, 5, 10)
+    assert names(tmp_path) == ["checkpoint-10.gz", "checkpoint-3.gz.tmp", "notes.txt"]
+
+
+def test_resume_adopts_existing_checkpoints(config, tmp_path):
+    pop = neat.population.Population(config)
+    save(BackgroundCheckpointer(directory=str(tmp_path), keep=0), pop, 5, 10)
+    # the checkpoints from before count towards keep, oldest first
+    save(BackgroundCheckpointer(directory=str(tmp_path), keep=3, resume=True), pop, 15, 20)
+    assert names(tmp_path) == ["checkpoint-10.gz", "checkpoint-15.gz", "checkpoint-20.gz"]
+
+
+def test_restore_skips_truncated_checkpoints(config, tmp_path):
+    pop = neat.population.Population(config)
+    save(BackgroundCheckpointer(directory=str(tmp_path), keep=0), pop, 5, 10)
+    newest = tmp_path / "checkpoint-10.gz"
+    newest.write_bytes(newest.read_bytes()[:100])
+    restored = restore_latest(str(tmp_path), config)
+    assert restored.generation == 5
+    assert sorted(restored.population) == sorted(pop.population)
+
+
+def test_run_directories(config, tmp_path):
+    first = run_directory(str(tmp_path))
+    second = run_directory(str(tmp_path))
+    assert first != second and os.path.isdir(first) and os.path.isdir(second)
+    assert latest_run(str(tmp_path)) is None
+    save(BackgroundCheckpointer(directory=first), neat.population.Population(config), 5)
+    assert latest_run(str(tmp_path)) == first
+    save(BackgroundCheckpointer(directory=second), neat.population.Population(config), 5)
+    assert latest_run(str(tmp_path)) == second
+    assert checkpoints(second) == [os.path.join(second, "checkpoint-5.gz")]
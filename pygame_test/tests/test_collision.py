@@ -0,0 +1,52 @@
+import numpy as np
+import pygame
+
+import assets
+from game import Bird, Pipe, pipe_collisions
+
+
+# masks made straight from the images, rather than taken from assets.mask
+MASKS = dict((img, pygame.mask.from_surface(assets.image(img))) for img in Bird.IMGS)
+TOP_MASK = pygame.mask.from_surface(assets.image("pipe", flipped=True))
+BOTTOM_MASK = pygame.mask.from_surface(assets.image("pipe"))
+
+
+def reference_collision(pipe, bird):
+    '''Pipe.collision as it was, without cached masks or the check for
+    whether the pipe is level with the bird'''
+    bird_mask = MASKS[bird.img]
+    top_mask = TOP_MASK
+    bottom_mask = BOTTOM_MASK
+    top_offset = (int(pipe.x - bird.x), pipe.top - round(bird.y))
+    bottom_offset = (int(pipe.x - bird.x), pipe.bottom - round(bird.y))
+    return bool(bird_mask.overlap(top_mask, top_offset) or bird_mask.overlap(bottom_mask, bottom_offset))
+
+
+def positions():
+    '''Every bird image at heights around the gap of a pipe, for the pipe at
+    every x from well to the right of the bird to well past it'''
+    pipe = Pipe(0, 300)
+    for x in range(100, 360, 2):
+        pipe.x = x
+        for y in np.arange(260, 520, 3.5):
+            for img in Bird.IMGS:
+                bird = Bird(230, float(y))
+                bird.img = img
+                yield pipe, bird
+
+
+def test_pipe_collision_matches_reference():
+    hits = 0
+    for pipe, bird in positions():
+        expected = reference_collision(pipe, bird)
+        assert pipe.collision(bird) == expected
+        hits += expected
+    assert hits # some of the positions overlap
+
+
+def test_collision_table_matches_reference():
+    table = pipe_collisions()
+    for pipe, bird in positions():
+        y = np.array([round(bird.y)])
+        hit = table.collide(np.array([Bird.IMGS.index(bird.img)]), int(pipe.x - bird.x), pipe.top - y, pipe.bottom - y)
+        assert hit[0] == reference_collision(pipe, bird)
@@ -0,0 +1,100 @@
+import time
+from multiprocessing import Process
+from multiprocessing.connection import Client
+
+import numpy as np
+import pytest
+
+import AI_flappy_bird
+from conftest import mutated_genomes, pilot
+from course import make_courses
+from distributed import DistributedEvaluator, worker
+from training import TrainingSettings
+
+AUTHKEY = b"test"
+
+
+def walk_out(address):
+    '''Takes a chunk and disconnects without answering, like a worker that dies mid-chunk'''
+    connection = Client(address, authkey=AUTHKEY)
+    connection.recv()
+    connection.close()
+
+
+@pytest.fixture
+def game_config(config):
+    config.training = TrainingSettings()
+    config.training.max_frames = 300
+    return config
+
+
+@pytest.fixture
+def coordinator():
+    evaluator = DistributedEvaluator(("localhost", 0), AUTHKEY, chunk_size=3, courses=make_courses(2, 3))
+    processes = []
+
+    def start(target, *args):
+        process = Process(target=target, args=(evaluator.address,) + args)
+        process.start()
+        processes.append(process)
+
+    yield evaluator, start
+    evaluator.close()
+    for process in processes:
+        process.join(10)
+        assert not process.is_alive()
+
+
+def genomes(config):
+    return [(i, pilot(config, i, bias)) for i, bias in enumerate(np.linspace(-0.3, 0.1, 6))] + \
+           [(genome.key + 6, genome) for genome in mutated_genomes(config, 6)]
+
+
+def played_in_one_game(population, config, courses):
+    AI_flappy_bird.main(population, config, headless=True, courses=courses, stop_at_threshold=False)
+    return [genome.fitness for _, genome in population]
+
+
+def test_matches_one_game_when_a_worker_walks_out(game_config, coordinator):
+    evaluator, start = coordinator
+    population = genomes(game_config)
+    expected = played_in_one_game(population, game_config, evaluator.courses)
+    start(walk_out)
+    while not evaluator.workers:
+        # let it connect first, so it is sure to take a chunk
+        time.sleep(0.01)
+    for _ in range(2):
+        start(worker, AUTHKEY)
+    for _, genome in population:
+        genome.fitness = None
+    evaluator.evaluate(population, game_config)
+    assert [genome.fitness for _, genome in population] == expected
+
+
+def test_failing_chunk_is_reported(game_config, coordinator):
+    evaluator, start = coordinator
+    population = genomes(game_config)
+    expected = played_in_one_game(population, game_config, evaluator.courses)
+    for _ in range(2):
+        start(worker, AUTHKEY)
+    broken = pilot(game_config, 100, 0.0)
+    broken.nodes[0].activation = "sigmoid" # which can't be batched, so the chunk raises
+    with pytest.raises(RuntimeError, match="can be batched"):
+        evaluator.evaluate(population + [(100, broken)], game_config)
+    # the workers are still there for the next generation
+    evaluator.evaluate(population, game_config)
+    assert [genome.fitness for _, genome in population] == expected
+
+
+def test_dropped_workers_connect_again(game_config, coordinator):
+    evaluator, start = coordinator
+    population = genomes(game_config)
+    expected = played_in_one_game(population, game_config, evaluator.courses)
+    for _ in range(2):
+        start(worker, AUTHKEY)
+    evaluator.timeout = 1e-6 # every worker is too slow
+    with pytest.raises(RuntimeError, match="took more than"):
+        evaluator.evaluate(population, game_config)
+    evaluator.timeout = None
+    evaluator.evaluate(population, game_config)
+    assert [genome.fitness for _, genome in population] == expected
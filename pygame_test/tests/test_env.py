@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+import assets
+from course import make_courses
+from env import FlappyEnv
+from game import WIN_HEIGHT, WIN_WIDTH, Base, Bird, Pipe
+
+
+class OneBird():
+    '''A game with a single Bird, played with the scalar Bird, Pipe and Base
+    the way the game loop played it before FlappyEnv'''
+
+    def __init__(self, course):
+        self.course = course
+        self.bird = Bird(WIN_WIDTH/2-25, WIN_HEIGHT/2-100)
+        self.base = Base()
+        self.pipes = [Pipe(WIN_WIDTH, course.height(0))]
+        self.pipe_count = 1
+        self.alive = True
+
+    def observation(self):
+        pipe = self.pipes[0] if not self.pipes[0].passed else self.pipes[1]
+        y = self.bird.y
+        return [y, abs(y - pipe.height), abs(y - pipe.bottom)]
+
+    def step(self, jump):
+        '''Moves the game on by a frame and returns the bird's reward'''
+        bird = self.bird
+        pipe_width = assets.size("pipe")[0]
+        self.base.move()
+        bird.move()
+        reward = 0.1
+        if jump:
+            bird.jump()
+        add_pipe = False
+        pipes_to_remove = []
+        for pipe in self.pipes:
+            if self.alive and pipe.collision(bird):
+                reward -= 1
+                self.alive = False
+            if pipe.x + pipe_width < bird.x and not pipe.passed:
+                if bird.y < 0:
+                    # flying over the pipe counts as hitting it
+                    self.alive = False
+                if self.alive:
+                    pipe.passed = True
+                    add_pipe = True
+            if pipe.x + pipe_width <= 0:
+                pipes_to_remove.append(pipe)
+            pipe.move()
+        if add_pipe:
+            reward += 5
+            self.pipes.append(Pipe(WIN_WIDTH, self.course.height(self.pipe_count)))
+            self.pipe_count += 1
+        for pipe in pipes_to_remove:
+            self.pipes.remove(pipe)
+        if self.base.collision(bird):
+            self.alive = False
+        bird.animate()
+        return reward
+
+
+def decide(observation, bias):
+    # jump when nearer the bottom pipe than the top one, give or take bias
+    return math.tanh(2.5*(bias + 0.01*observation[1] - 0.01*observation[2])) > 0.5
+
+
+def test_env_plays_like_single_birds():
+    courses = make_courses(4, 11)
+    played = [courses[i // 2] for i in range(8)] # two birds on each course
+    biases = np.linspace(-0.3, 0.1, 8)
+    games = [OneBird(course) for course in played]
+    env = FlappyEnv(8)
+    observations = env.reset(courses=played)
+    assert observations.tolist() == [game.observation() for game in games]
+
+    rewards_seen = set()
+    for frame in range(2000):
+        jumps = [decide(game.observation(), bias) for game, bias in zip(games, biases)]
+        observations, rewards, dones = env.step(np.array(jumps))
+        for i, (game, jump) in enumerate(zip(games, jumps)):
+            if not game.alive:
+                # a dead bird gets nothing more
+                assert dones[i] and rewards[i] == 0
+                continue
+            reward = game.step(jump)
+            assert rewards[i] == reward
+            assert dones[i] == (not game.alive)
+            if game.alive:
+                assert observations[i].tolist() == game.observation()
+            rewards_seen.add(round(reward, 6))
+        if dones.all():
+            break
+    # every kind of reward came up
+    assert {0.1, 5.1, -0.9} <= rewards_seen
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import AI_flappy_bird
+from conftest import mutated_genomes, pilot
+from course import make_courses
+from parallel_eval import PoolEvaluator
+from training import TrainingSettings
+
+
+def pilots(config, count=10):
+    return [(i, pilot(config, i, bias)) for i, bias in enumerate(np.linspace(-0.3, 0.1, count))]
+
+
+def test_chunks_ignore_the_threshold(config):
+    # a threshold some pilots reach partway through the game
+    config.fitness_threshold = 30
+    config.training = TrainingSettings()
+    config.training.courses = 3
+    config.training.max_frames = 1000
+    courses = make_courses(3, 5)
+    genomes = pilots(config)
+
+    frames, _ = AI_flappy_bird.main(genomes, config, headless=True, courses=courses)
+    assert frames < 1000 # the whole population played in one game stops at the threshold
+    whole = AI_flappy_bird.eval_genomes(genomes, config, courses)
+    alone = [AI_flappy_bird.eval_genomes([genome], config, courses)[0] for genome in genomes]
+    assert whole == alone
+
+
+@pytest.mark.parametrize("num_workers, chunk_size", [(1, None), (2, None), (3, 1), (2, 4)])
+def test_pool_matches_one_game(config, num_workers, chunk_size):
+    config.training = TrainingSettings()
+    config.training.courses = 2
+    config.training.max_frames = 600
+    courses = make_courses(2, 7)
+    genomes = pilots(config) + [(genome.key, genome) for genome in mutated_genomes(config, 12)]
+    AI_flappy_bird.main(genomes, config, headless=True, courses=courses, stop_at_threshold=False)
+    expected = [genome.fitness for _, genome in genomes]
+
+    evaluator = PoolEvaluator(num_workers, AI_flappy_bird.eval_genomes, chunk_size, courses)
+    try:
+        for _, genome in genomes:
+            genome.fitness = None
+        evaluator.evaluate(genomes, config)
+    finally:
+        evaluator.close()
+    assert [genome.fitness for _, genome in genomes] == expected
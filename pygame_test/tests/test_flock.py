@@ -0,0 +1,37 @@
+import numpy as np
+
+from flock import Flock
+from game import Bird, Pipe, pipe_collisions
+
+
+def test_flock_moves_like_birds():
+    rng = np.random.default_rng(0)
+    birds = [Bird(230, 350) for _ in range(40)]
+    flock = Flock(len(birds), 230, 350, Bird.IMGS, pipe_collisions())
+    pipe = Pipe(500, 200)
+    for frame in range(400):
+        jumping = rng.random(len(birds)) < 0.05
+        flock.jump(jumping)
+        flock.move()
+        flock.animate()
+        for bird, jump in zip(birds, jumping):
+            if jump:
+                bird.jump()
+            bird.move()
+            bird.animate()
+        assert flock.y.tolist() == [bird.y for bird in birds]
+        assert flock.tilt.tolist() == [bird.tilt for bird in birds]
+        assert [Bird.IMGS[i] for i in flock.img_index] == [bird.img for bird in birds]
+
+        pipe.move()
+        if pipe.x < -100:
+            pipe = Pipe(500, int(rng.integers(50, 450)))
+        assert flock.collide(pipe).tolist() == [pipe.collision(bird) for bird in birds]
+
+
+def test_only_live_members_collide():
+    flock = Flock(6, 230, 350, Bird.IMGS, pipe_collisions())
+    pipe = Pipe(230, 600) # the top pipe reaches well below the birds
+    flock.kill(np.array([1, 4]))
+    assert flock.collide(pipe).tolist() == [True, False, True, True, False, True]
+    assert flock.collide(pipe, np.array([0, 1, 2])).tolist() == [True, False, True, False, False, False]
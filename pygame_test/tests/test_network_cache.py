@@ -0,0 +1,97 @@
+import random
+
+import neat
+import pytest
+from neat.reporting import BaseReporter
+
+import AI_flappy_bird
+from conftest import mutated_genomes
+from course import make_courses
+from network_cache import NetworkCache, fingerprint
+from training import TrainingSettings
+
+
+class FitnessLog(BaseReporter):
+    '''Keeps the fitness of every genome of every generation'''
+
+    def __init__(self):
+        self.fitness = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.fitness.append(sorted((key, genome.fitness) for key, genome in population.items()))
+
+
+def fitness_per_generation(config, cache, played):
+    random.seed(2)
+    pop = neat.population.Population(config)
+    log = FitnessLog()
+    pop.add_reporter(log)
+    courses = make_courses(2, 4)
+
+    def fitness_function(genomes, config):
+        played.extend(genome_id for genome_id, _ in genomes)
+        AI_flappy_bird.main(genomes, config, headless=True, courses=courses, cache=cache)
+
+    if cache is not None:
+        pop.add_reporter(cache)
+        fitness_function = cache.reuse_fitness(fitness_function, courses)
+    pop.run(fitness_function, 6)
+    return log.fitness
+
+
+def test_cached_run_matches(config):
+    config.fitness_threshold = 1e9
+    config.training = TrainingSettings()
+    config.training.courses = 2
+    config.training.max_frames = 300
+    assert config.training.repeatable(config)
+    played, played_with_cache = [], []
+    assert fitness_per_generation(config, NetworkCache(), played_with_cache) == fitness_per_generation(config, None, played)
+    assert len(played_with_cache) < len(played) # some genomes were looked up rather than played
+
+
+def test_least_recently_used_dropped_first(config):
+    first, second, third = mutated_genomes(config, 3)
+    cache = NetworkCache(maxsize=2)
+    cache.network(first, config)
+    cache.network(second, config)
+    cache.network(first, config) # now the second is the least recently used
+    cache.network(third, config)
+    assert list(cache.networks) == [fingerprint(first), fingerprint(third)]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_least_recently_played_dropped_first(config):
+    genomes = [(genome.key, genome) for genome in mutated_genomes(config, 3)]
+    played = []
+
+    def play(genomes, config):
+        for genome_id, genome in genomes:
+            played.append(genome_id)
+            genome.fitness = float(genome_id)
+
+    cache = NetworkCache(maxsize=2)
+    evaluate = cache.reuse_fitness(play, make_courses(1, 0))
+    evaluate(genomes[:2], config)
+    evaluate(genomes[:1], config) # the first is looked up, so the second is the least recently used
+    evaluate(genomes[2:], config)
+    evaluate(genomes, config)
+    assert played == [0, 1, 2, 1]
+
+
+@pytest.mark.parametrize("settings, criterion, repeatable", [
+    ({}, "max", True),
+    ({"max_frames": 500}, "max", True),
+    ({"max_seconds": 10.0}, "max", False),
+    ({"max_pipes": 20}, "max", True),
+    ({"max_pipes": 20, "courses": 3}, "max", False),
+    ({}, "mean", False), # another genome reaching a mean threshold ends the game
+    ({"stop_at_threshold": False}, "mean", True),
+])
+def test_repeatable(config, settings, criterion, repeatable):
+    config.fitness_criterion = criterion
+    training = TrainingSettings()
+    training.courses = 1
+    for name, value in settings.items():
+        setattr(training, name, value)
+    assert bool(training.repeatable(config)) == repeatable
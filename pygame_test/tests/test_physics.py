@@ -0,0 +1,49 @@
+import numpy as np
+
+import physics
+from game import Bird
+
+
+class FormulaBird():
+    '''Moves like Bird.move did before the tables, working out every
+    displacement with the formula'''
+
+    def __init__(self, y):
+        self.y = y
+        self.vel = 0
+        self.tick_count = 0
+
+    def jump(self):
+        self.vel = physics.JUMP_VEL
+        self.tick_count = 0
+
+    def move(self):
+        self.tick_count += 1
+        self.y += physics.displacement(self.vel, self.tick_count)
+
+
+def test_tables_match_formula():
+    for vel, arc in physics.ARCS.items():
+        assert len(arc) == physics.LAST_TICK + 1
+        for tick_count in range(1, 200):
+            expected = physics.displacement(vel, tick_count)
+            assert (arc[tick_count] if tick_count <= physics.LAST_TICK else physics.TERMINAL_VEL) == expected
+    for tick_count in range(1, physics.LAST_TICK + 1):
+        assert physics.DISPLACEMENTS[tick_count] == physics.displacement(0, tick_count)
+        assert physics.DISPLACEMENTS[physics.JUMP_OFFSET + tick_count] == physics.displacement(physics.JUMP_VEL, tick_count)
+
+
+def test_bird_moves_like_formula():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        y = float(rng.integers(100, 600))
+        bird = Bird(230, y)
+        reference = FormulaBird(y)
+        gap = int(rng.integers(1, 40)) # frames between jumps, some long enough to reach terminal velocity
+        for frame in range(300):
+            if frame % gap == gap - 1:
+                bird.jump()
+                reference.jump()
+            bird.move()
+            reference.move()
+            assert bird.y == reference.y
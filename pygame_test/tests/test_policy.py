@@ -0,0 +1,39 @@
+import neat
+import numpy as np
+
+from conftest import mutated_genomes
+from policy import Policy, export
+
+
+def exported(genomes, config, directory):
+    '''Returns the network and the loaded policy of each genome'''
+    pairs = []
+    for genome in genomes:
+        filename = str(directory / "policy-{0:d}.npz".format(genome.key))
+        export(genome, config, filename)
+        pairs.append((neat.nn.FeedForwardNetwork.create(genome, config), Policy.load(filename)))
+    return pairs
+
+
+def test_decide_matches_network(config, tmp_path):
+    rng = np.random.default_rng(0)
+    for net, policy in exported(mutated_genomes(config, 30), config, tmp_path):
+        for inputs in rng.uniform(-500, 500, (50, 3)).tolist():
+            assert policy.activate(*inputs) == net.activate(inputs)[0]
+            assert policy.decide(*inputs) == (net.activate(inputs)[0] > 0.5)
+
+
+def test_decide_batch_matches_network(config, tmp_path):
+    rng = np.random.default_rng(1)
+    for net, policy in exported(mutated_genomes(config, 30), config, tmp_path):
+        inputs = rng.uniform(-500, 500, (50, 3))
+        expected = [net.activate(tuple(row))[0] > 0.5 for row in inputs]
+        assert policy.decide_batch(inputs).tolist() == expected
+
+
+def test_fitness_is_saved(config, tmp_path):
+    genome, unplayed = mutated_genomes(config, 2)
+    genome.fitness = 12.5
+    (_, policy), (_, unplayed_policy) = exported([genome, unplayed], config, tmp_path)
+    assert policy.fitness == 12.5
+    assert unplayed_policy.fitness is None
@@ -0,0 +1,27 @@
+import numpy as np
+
+import AI_flappy_bird
+from conftest import mutated_genomes, pilot
+from course import make_courses
+from replay import Trace, TraceRecorder, replay, verify
+from training import TrainingSettings
+
+
+def test_replay_matches_recording(config, tmp_path):
+    config.training = TrainingSettings()
+    config.training.max_frames = 600
+    genomes = mutated_genomes(config, 30) + [pilot(config, 30 + i, bias) for i, bias in enumerate(np.linspace(-0.3, 0.1, 10))]
+    recorder = TraceRecorder(str(tmp_path))
+    recorder.start_generation(0)
+    AI_flappy_bird.main([(genome.key, genome) for genome in genomes], config, headless=True, courses=make_courses(2, 5),
+                        recorder=recorder)
+
+    trace = Trace(str(tmp_path / "trace-0.npz"))
+    assert len(trace) == 80
+    assert trace.fitness.max() > 4*AI_flappy_bird.FlappyEnv.PIPE_REWARD # some birds got through a few pipes
+    fitness, mismatches = verify(trace)
+    assert len(mismatches) == 0
+    assert fitness.tolist() == trace.fitness.tolist()
+    # a bird replayed on its own does what it did with the others
+    for i in np.argsort(-trace.fitness)[:5]:
+        assert replay(trace, i)[0] == trace.fitness[i]
@@ -0,0 +1,41 @@
+import csv
+
+import pytest
+
+import AI_flappy_bird
+from conftest import CONFIG_FILE
+from reporters import StatsLog
+
+
+def rows(filename):
+    with open(filename, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_stats_log_starts_afresh_unless_resuming(tmp_path):
+    filename = str(tmp_path / "stats.csv")
+    with open(filename, "w") as f:
+        f.write("an older run\n")
+    StatsLog(filename).close()
+    assert rows(filename) == [StatsLog.COLUMNS]
+    StatsLog(filename, resume_from=0).close()
+    assert rows(filename) == [StatsLog.COLUMNS]
+
+
+def test_resumed_stats_log_drops_the_generations_played_again(tmp_path):
+    filename = str(tmp_path / "stats.csv")
+    with open(filename, "w", newline="") as f:
+        csv.writer(f).writerows([StatsLog.COLUMNS] + [[generation] + [""]*9 for generation in range(10)])
+    StatsLog(filename, resume_from=5).close()
+    assert [row[0] for row in rows(filename)] == ["generation", "0", "1", "2", "3", "4"]
+
+
+def test_refused_run_keeps_the_stats_log(tmp_path):
+    checkpoint_dir = tmp_path / "checkpoints"
+    checkpoint_dir.mkdir()
+    (checkpoint_dir / "checkpoint-5.gz").write_bytes(b"")
+    filename = tmp_path / "stats.csv"
+    filename.write_text("the last run's rows\n")
+    with pytest.raises(FileExistsError):
+        AI_flappy_bird.run(CONFIG_FILE, headless=True, checkpoint_dir=str(checkpoint_dir), stats_file=str(filename))
+    assert filename.read_text() == "the last run's rows\n"
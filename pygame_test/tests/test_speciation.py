@@ -0,0 +1,60 @@
+import random
+from configparser import ConfigParser
+
+import neat
+import pytest
+from neat.reporting import BaseReporter
+
+from conftest import CONFIG_FILE
+from speciation import CachedSpeciesSet
+
+
+def make_config(species_set_type, directory, **settings):
+    '''Returns the game's config with 150 genomes for species_set_type, with
+    settings changed in its section'''
+    parser = ConfigParser()
+    parser.read(CONFIG_FILE)
+    parser.set("NEAT", "pop_size", "150")
+    parser.set("NEAT", "fitness_threshold", "1e9")
+    if species_set_type is neat.DefaultSpeciesSet:
+        parser.add_section("DefaultSpeciesSet")
+        parser.set("DefaultSpeciesSet", "compatibility_threshold", parser.get("CachedSpeciesSet", "compatibility_threshold"))
+        parser.remove_section("CachedSpeciesSet")
+    for name, value in settings.items():
+        parser.set("CachedSpeciesSet", name, str(value))
+    filename = str(directory / "{0}.txt".format(species_set_type.__name__))
+    with open(filename, "w") as f:
+        parser.write(f)
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, species_set_type, neat.DefaultStagnation, filename)
+
+
+def fitness(genomes, config):
+    # depends only on the genome, so both runs select the same genomes
+    for _, genome in genomes:
+        genome.fitness = sum(c.weight for c in genome.connections.values()) + random.Random(genome.key).random()
+
+
+class SpeciesLog(BaseReporter):
+    '''Keeps the members of every species at the end of each generation'''
+
+    def __init__(self):
+        self.species = []
+
+    def end_generation(self, config, population, species_set):
+        self.species.append(sorted((sid, sorted(s.members)) for sid, s in species_set.species.items()))
+
+
+def species_per_generation(config, generations=8):
+    random.seed(1)
+    pop = neat.population.Population(config)
+    log = SpeciesLog()
+    pop.add_reporter(log)
+    pop.run(fitness, generations)
+    return log.species
+
+
+@pytest.mark.parametrize("settings", [{}, {"vectorized_distance": False}, {"distance_cache_size": 0}, {"distance_cache_size": 100}])
+def test_same_species_as_default(tmp_path, settings):
+    expected = species_per_generation(make_config(neat.DefaultSpeciesSet, tmp_path))
+    assert len(expected[-1]) > 1 # otherwise there is nothing to get wrong
+    assert species_per_generation(make_config(CachedSpeciesSet, tmp_path, **settings)) == expected
@@ -0,0 +1,26 @@
+import numpy as np
+
+from flock import Flock
+from game import Base, Bird, pipe_collisions
+from viewer import HEADER, Viewer
+
+
+def test_publish_shows_the_fittest_birds():
+    # a Viewer without its window process, just the snapshot it writes to
+    viewer = Viewer.__new__(Viewer)
+    viewer.num_birds = 5
+    viewer.snapshot = np.zeros(HEADER + Viewer.MAX_PIPES*2 + viewer.num_birds*2)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        birds = Flock(60, 230, 350, Bird.IMGS, pipe_collisions())
+        birds.y = rng.uniform(0, 700, len(birds)) # tells the birds apart in the snapshot
+        birds.kill(rng.random(len(birds)) < 0.5)
+        fitness = rng.integers(0, 6, len(birds)) * 0.1 # lots of ties, as in a real game
+        members = np.arange(10, 60) if rng.random() < 0.5 else None
+        viewer.publish(0, 0, Base(), [], birds, fitness, members)
+
+        living = birds.living(members)
+        expected = living[np.argsort(-fitness[living], kind="stable")[:viewer.num_birds]]
+        start = HEADER + Viewer.MAX_PIPES*2
+        assert viewer.snapshot[HEADER-1] == len(expected)
+        assert viewer.snapshot[start:start+2*len(expected):2].tolist() == birds.y[expected].tolist()
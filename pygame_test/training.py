@@ -0,0 +1,59 @@
+from configparser import ConfigParser
+
+import numpy as np
+
+
+class TrainingSettings():
+    '''Settings for the game side of training, read from the [Training] section
+    of the NEAT config file. run() attaches them to the neat config as
+    config.training so they reach main wherever it runs'''
+
+    def __init__(self, filename=None):
+        parameters = ConfigParser()
+        if filename is not None:
+            parameters.read(filename)
+        section = parameters['Training'] if parameters.has_section('Training') else {}
+
+        # limits on one generation's game, 0 means no limit
+        self.max_frames = int(section.get('max_frames', 0))
+        self.max_pipes = int(section.get('max_pipes', 0))
+        self.max_seconds = float(section.get('max_seconds', 0))
+        # end the game as soon as the fitness criterion reaches fitness_threshold
+        self.stop_at_threshold = section.get('stop_at_threshold', 'True').strip().lower() in ('true', '1', 'yes', 'on')
+        # when the game is drawn, only draw the draw_top fittest live birds (0 for all of them)
+        # and only draw every draw_every frames
+        self.draw_top = int(section.get('draw_top', 0))
+        self.draw_every = max(1, int(section.get('draw_every', 1)))
+        # every genome plays this many courses at once, and its fitness on them
+        # is combined with aggregation: mean, min or quantile (the given quantile of them)
+        self.courses = max(1, int(section.get('courses', 1)))
+        self.aggregation = section.get('aggregation', 'mean').strip().lower()
+        self.quantile = float(section.get('quantile', 0.25))
+        if self.aggregation not in ('mean', 'min', 'quantile'):
+            raise ValueError("Unexpected aggregation: {0!r}".format(self.aggregation))
+
+    def out_of_budget(self, frames, pipes, seconds):
+        '''Returns True if a game that has run this many frames, passed this
+        many pipes and taken this many seconds has to end'''
+        return ((self.max_frames and frames >= self.max_frames) or
+                (self.max_pipes and pipes >= self.max_pipes) or
+                (self.max_seconds and seconds >= self.max_seconds))
+
+    def repeatable(self, config):
+        '''Returns True if a genome always gets the same fitness on the same
+        courses, whatever else is in its generation. That isn't so when the
+        game can be cut short by the time it takes, by another genome passing
+        max_pipes on a different course, or by another genome reaching a mean
+        or min fitness_threshold'''
+        if self.max_seconds or (self.max_pipes and self.courses > 1):
+            return False
+        return config.fitness_criterion == 'max' or not self.stop_at_threshold or config.no_fitness_termination
+
+    def aggregate(self, fitness):
+        '''Combines a (courses, genomes) array of every genome's fitness on each
+        course into one fitness per genome'''
+        if self.aggregation == 'mean':
+            return fitness.mean(axis=0)
+        if self.aggregation == 'min':
+            return fitness.min(axis=0)
+        return np.quantile(fitness, self.quantile, axis=0)
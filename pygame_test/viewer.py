@@ -0,0 +1,105 @@
+from multiprocessing import Process, RawArray
+
+import numpy as np
+import pygame
+
+import assets
+import game
+
+HEADER = 7 # write count, frame, score, base x, second base x, number of pipes, number of birds
+
+
+class Viewer():
+    '''Shows a headless training run live from a separate process. Every frame
+    main publishes a small snapshot of the world (the pipes, the base and the
+    fittest few birds) into shared memory, overwriting the last one, and the
+    viewer process draws whatever the newest snapshot is at its own 30 fps.
+    Publishing never waits for the viewer, so a slow or closed viewer only
+    misses frames and never slows training down'''
+    MAX_PIPES = 4 # there are never more than this many pipes on the screen
+
+    def __init__(self, num_birds=5):
+        self.num_birds = num_birds # how many of the fittest birds are shown
+        self.raw = RawArray('d', HEADER + self.MAX_PIPES*2 + num_birds*2)
+        self.snapshot = np.frombuffer(self.raw, dtype=np.float64)
+        self.process = Process(target=show, args=(self.raw, num_birds), daemon=True)
+        self.process.start()
+
+    def publish(self, frame, score, base, pipes, birds, fitness, members=None):
+        '''Writes the current state of the game into the snapshot, only
+        showing the birds in members if given'''
+        shown = birds.living(members)
+        if len(shown) > self.num_birds:
+            # only pick out the fittest few rather than sorting every bird, keeping
+            # the first birds of those tied for the last place so the same ones stay shown
+            fitness_shown = fitness[shown]
+            last = fitness_shown[np.argpartition(-fitness_shown, self.num_birds-1)[self.num_birds-1]]
+            fitter = shown[fitness_shown > last]
+            shown = np.concatenate((fitter, shown[fitness_shown == last][:self.num_birds-len(fitter)]))
+        shown = shown[np.argsort(-fitness[shown], kind="stable")]
+        pipes = pipes[:self.MAX_PIPES]
+        snapshot = self.snapshot
+        # the write count is odd while a snapshot is half written, so the viewer can skip it
+        snapshot[0] += 1
+        snapshot[1:HEADER] = (frame, score, base.x, base.x2, len(pipes), len(shown))
+        for i, pipe in enumerate(pipes):
+            snapshot[HEADER+2*i:HEADER+2*i+2] = (pipe.x, pipe.height)
+        start = HEADER + self.MAX_PIPES*2
+        snapshot[start:start+2*len(shown)] = np.column_stack((birds.y[shown], birds.tilt[shown])).ravel()
+        snapshot[0] += 1
+
+    def close(self):
+        '''Closes the viewer window'''
+        self.process.terminate()
+        self.process.join()
+
+
+def read(snapshot):
+    '''Returns a copy of the snapshot, or None if it was being written while it was copied'''
+    count = snapshot[0]
+    if count % 2:
+        return None
+    copy = snapshot.copy()
+    if snapshot[0] != count:
+        return None
+    return copy
+
+
+def show(raw, num_birds):
+    '''Runs in the viewer process: draws the newest snapshot 30 times a second
+    with the game's own Bird, Pipe and Base drawing code'''
+    snapshot = np.frombuffer(raw, dtype=np.float64)
+    window = pygame.display.set_mode((game.WIN_WIDTH, game.WIN_HEIGHT))
+    pygame.display.set_caption("Flappy Bird training")
+    clock = pygame.time.Clock()
+    birds = [game.Bird(game.WIN_WIDTH/2-25, 0) for _ in range(num_birds)]
+    base = game.Base()
+    last_count = None # write count of the last snapshot drawn
+
+    while True:
+        clock.tick(30)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+        copy = read(snapshot)
+        if copy is None or copy[0] == 0 or copy[0] == last_count:
+            # nothing new to draw yet
+            continue
+        last_count = copy[0]
+        _, score, base.x, base.x2, num_pipes, num_shown = copy[1:HEADER]
+
+        window.blit(assets.image("bg", opaque=True), (0, 0))
+        for i in range(int(num_pipes)):
+            x, height = copy[HEADER+2*i:HEADER+2*i+2]
+            game.Pipe(x, int(height)).draw(window)
+        text = assets.text(str(int(score)))
+        window.blit(text, (game.WIN_WIDTH-10-text.get_width(), 10))
+        base.draw(window)
+        start = HEADER + Viewer.MAX_PIPES*2
+        for i in range(int(num_shown)):
+            bird = birds[i]
+            bird.y, tilt = copy[start+2*i:start+2*i+2]
+            bird.tilt = int(tilt)
+            bird.draw(window)
+        pygame.display.update()